@@ -1,10 +1,13 @@
 import streamlit as st
 import json
+import html
 import uuid
 from datetime import datetime
 import pandas as pd
+import numpy as np
 import folium
-from streamlit_folium import folium_static
+from folium.plugins import FastMarkerCluster
+import streamlit.components.v1 as components
 import plotly.express as px
 import os
 from math import radians, cos, sin, asin, sqrt
@@ -12,6 +15,9 @@ import requests
 from dotenv import load_dotenv
 import time
 import random
+import copy
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables
 load_dotenv()
@@ -20,7 +26,7 @@ load_dotenv()
 from create_agents import create_women_safety_agents
 from agent_handlers import IncidentReportingHandler, SafetyNavigatorHandler, EmergencyAlertHandler
 from database import Database
-from sms_service import SMSService
+from sms_service import sms_service
 
 # Set page configuration
 st.set_page_config(
@@ -37,8 +43,14 @@ def get_database():
 
 db = get_database()
 
-# Initialize SMS service
-sms_service = SMSService()
+# Background pool for SOS notifications, shared across reruns
+@st.cache_resource
+def get_sms_jobs():
+    """Return the notification executor and the dict of pending jobs by ID, as (time submitted, future)"""
+    return ThreadPoolExecutor(max_workers=8), {}
+
+# Seconds a job is kept for its session to collect; finished jobs older than this are dropped
+SOS_JOB_TTL = 600
 
 # Initialize session state
 if 'user_id' not in st.session_state:
@@ -48,7 +60,7 @@ if 'active_journey' not in st.session_state:
 if 'reports' not in st.session_state:
     st.session_state.reports = []
 if 'alerts' not in st.session_state:
-    st.session_state.alerts = []
+    st.session_state.alerts = {}  # alert_id -> alert
 if 'agents_initialized' not in st.session_state:
     st.session_state.agents_initialized = False
 if 'emergency_contacts' not in st.session_state:
@@ -68,6 +80,12 @@ if 'last_location_update' not in st.session_state:
     st.session_state.last_location_update = datetime.now().isoformat()
 if 'tracking_thread_active' not in st.session_state:
     st.session_state.tracking_thread_active = False
+if 'last_sos_job' not in st.session_state:
+    st.session_state.last_sos_job = None
+if 'last_sos_results' not in st.session_state:
+    st.session_state.last_sos_results = None
+if 'last_sos_action' not in st.session_state:
+    st.session_state.last_sos_action = None
 
 # Initialize agents automatically
 @st.cache_resource
@@ -92,15 +110,21 @@ def get_agents_and_handlers():
 # Auto-initialize agents
 handlers = get_agents_and_handlers()
 
+# Cached area reports (cleared when a new report is submitted)
+@st.cache_data(ttl=30)
+def get_cached_reports(latitude, longitude, radius_km):
+    return handlers["incident_handler"].get_reports_by_area(latitude, longitude, radius_km)
+
 # Function to get directions using OpenStreetMap Nominatim (free)
+@st.cache_data
 def get_directions(origin, destination, mode="walking"):
-    """Get directions between two points (simplified version)"""
+    """Get directions between two points as an (N, 2) array of [lat, lng] (simplified version)"""
     # This is a simplified version that just returns a straight line
     # For a real app, you could use the OSRM API or other free routing services
-    return [
-        {"lat": origin["latitude"], "lng": origin["longitude"]},
-        {"lat": destination["latitude"], "lng": destination["longitude"]}
-    ]
+    return np.array([
+        [origin["latitude"], origin["longitude"]],
+        [destination["latitude"], destination["longitude"]]
+    ])
 
 # Function to calculate distance between two points
 def calculate_distance(lat1, lon1, lat2, lon2):
@@ -117,8 +141,9 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     
     return c * r
 
-# Function to get a map with OpenStreetMap tiles
-def get_map(center_lat, center_lng, zoom=13):
+# Function to build the base OpenStreetMap map, cached per (rounded) center and zoom
+@st.cache_resource(max_entries=64)
+def get_base_map(center_lat, center_lng, zoom):
     """Create a folium map with OpenStreetMap tiles"""
     m = folium.Map(
         location=[center_lat, center_lng],
@@ -127,6 +152,25 @@ def get_map(center_lat, center_lng, zoom=13):
     )
     return m
 
+# Function to get a map with OpenStreetMap tiles
+def get_map(center_lat, center_lng, zoom=13):
+    """Get a folium map with OpenStreetMap tiles that the caller can add markers to"""
+    # Maps are mutable, so hand out a copy to keep the cached template clean
+    return copy.deepcopy(get_base_map(round(center_lat, 3), round(center_lng, 3), zoom))
+
+# Function to render a map to HTML, reusing the result while its inputs are unchanged
+@st.cache_data(max_entries=64, hash_funcs={folium.Map: lambda m: None})
+def render_map_html(key, m):
+    """Render a folium map to HTML (cached by key, the map object itself is not hashed)"""
+    return m.get_root().render()
+
+# Function to display a map
+def show_map(m, key, height=500):
+    """Display a folium map; key must capture everything that was drawn on it"""
+    # Hash the inputs down to a short digest so large keys (e.g. location history) stay cheap to look up
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+    components.html(render_map_html(digest, m), height=height)
+
 # Function to simulate getting current location
 def get_current_location():
     """Simulate getting the current location"""
@@ -172,6 +216,24 @@ def get_current_location():
         "accuracy": st.session_state.location_history[-1]["accuracy"]
     }
 
+# Function to reuse a recent location fix instead of asking for a new one
+def get_current_location_cached(max_age=10):
+    """Return the last location fix if it is younger than max_age seconds"""
+    now = time.time()
+    if now - st.session_state.get("_location_fix_ts", 0) < max_age:
+        location_data = st.session_state["_location_fix"]
+        # Re-apply the fix, in case the coordinates were edited since it was taken
+        st.session_state.user_location = {
+            "latitude": location_data["latitude"],
+            "longitude": location_data["longitude"]
+        }
+        return location_data
+    
+    location_data = get_current_location()
+    st.session_state["_location_fix_ts"] = now
+    st.session_state["_location_fix"] = location_data
+    return location_data
+
 # Function to start location tracking
 def start_location_tracking():
     """Start simulated location tracking"""
@@ -203,6 +265,69 @@ def generate_location_sharing_link():
     sharing_code = st.session_state.location_sharing_code
     return f"https://example.com/share-location/{sharing_code}"
 
+# Function to send the same SMS to several contacts concurrently
+def send_sms_to_contacts(contacts, message):
+    """Send an SMS to each contact concurrently and return how many were sent"""
+    results = sms_service.send_bulk_sms([contact["phone"] for contact in contacts], message)
+    return sum(1 for result in results if result["status"] in {"sent", "simulated"})
+
+# Function to drop finished SOS jobs that no session collected
+def sweep_sos_jobs(pending):
+    """Remove jobs that finished and were submitted more than SOS_JOB_TTL seconds ago"""
+    cutoff = time.monotonic() - SOS_JOB_TTL
+    for job_id, (submitted, future) in list(pending.items()):
+        if submitted < cutoff and future.done():
+            pending.pop(job_id, None)
+
+# Function to send SOS notifications without blocking the page
+def submit_sos_notifications(action, **kwargs):
+    """Queue send_sos_notifications in the background and remember the job and its action ("emergency" or "test") for this session"""
+    executor, pending = get_sms_jobs()
+    sweep_sos_jobs(pending)
+    job_id = str(uuid.uuid4())
+    pending[job_id] = (time.monotonic(), executor.submit(sms_service.send_sos_notifications, **kwargs))
+    st.session_state.last_sos_job = job_id
+    st.session_state.last_sos_action = action
+    st.session_state.last_sos_results = None
+    return job_id
+
+# Marker colors and CSS classes by severity / risk level
+_SEV_COLOR = {"high": "red", "medium": "orange", "low": "green"}
+_SEV_CLASS = {"high": "danger-area", "medium": "warning-area", "low": "safe-area"}
+
+# Marker icon settings; a folium.Icon belongs to the one map it was added to, so each marker gets a new one
+_ICON_USER = {"color": "blue", "icon": "user"}
+_ICON_EMERGENCY = {"color": "red", "icon": "exclamation"}
+_ICON_START = {"color": "green", "icon": "play"}
+_ICON_DESTINATION = {"color": "red", "icon": "flag"}
+_ICON_REPORT = {"color": "orange", "icon": "info-sign"}
+_ICON_TRAIL = {"color": "blue", "icon": "record"}
+_ICON_TRAIL_LAST = {"color": "red", "icon": "user"}
+_ALERT_ICONS = {color: {"color": color, "icon": "warning-sign"} for color in ("red", "orange", "green")}
+
+# Builds a report marker in the browser from a [lat, lng, color, popup, tooltip] row;
+# popup and tooltip are bound as HTML, so they must be escaped before they go in the row
+_REPORT_MARKER_CALLBACK = """
+function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'info-sign', markerColor: row[2], prefix: 'glyphicon'});
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    marker.bindPopup(row[3]);
+    marker.bindTooltip(row[4]);
+    return marker;
+}
+"""
+
+# Card markup shared by the alert, verification and risk listings
+_CARD = "<div class='card'><h4 class='{cls}'>{title}</h4><p>{desc}</p><p class='info-text'>{meta}</p></div>"
+_REPORT_CARD = "<div class='card'><h4 class='{cls}'>{severity} - {categories}</h4><p class='info-text'>Reported: {timestamp} • Distance: {distance} km</p></div>"
+
+# Journey status SMS sent to the selected contacts
+_JOURNEY_MSG_TPL = (
+    "I'm currently on a journey. My current location is: {lat:.4f}, {lng:.4f}. "
+    "I'm {dist:.2f} km away from my destination. "
+    "View my location: https://www.openstreetmap.org/?mlat={lat}&mlon={lng}#map=15/{lat}/{lng}"
+)
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -353,7 +478,7 @@ with st.sidebar:
     # SOS Button
     if st.button("🆘 SOS EMERGENCY", use_container_width=True, type="primary"):
         # Get current location
-        location_data = get_current_location()
+        location_data = get_current_location_cached()
         
         # Use the current location or the last known location
         current_location = st.session_state.user_location
@@ -384,6 +509,27 @@ with st.sidebar:
             st.success(f"SOS alert sent to {len(notification_results)} emergency contacts!")
     
     st.markdown("<p class='info-text' style='text-align: center;'>Click for immediate help</p>", unsafe_allow_html=True)
+    
+    # Status of the last background notification job
+    if st.session_state.last_sos_job:
+        _, pending = get_sms_jobs()
+        job = pending.get(st.session_state.last_sos_job)
+        label = "test alert" if st.session_state.last_sos_action == "test" else "emergency notifications"
+        if job is None:
+            st.session_state.last_sos_job = None
+        elif job[1].done():
+            pending.pop(st.session_state.last_sos_job, None)
+            st.session_state.last_sos_job = None
+            error = job[1].exception()
+            if error:
+                st.error(f"Failed to send {label}: {error}")
+            else:
+                st.session_state.last_sos_results = job[1].result()
+                sent = sum(1 for r in st.session_state.last_sos_results if r["status"] in ["sent", "simulated"])
+                st.toast(f"{label.capitalize()} delivered to {sent} of {len(st.session_state.last_sos_results)} contacts")
+        else:
+            st.info(f"Sending {label} in the background...")
+            st.button("Refresh status", key="refresh_sos_job", use_container_width=True)
 
 # Home page
 if page == "🏠 Home":
@@ -392,7 +538,7 @@ if page == "🏠 Home":
     # Get current location
     if st.button("Update My Location"):
         with st.spinner("Getting your location..."):
-            location_data = get_current_location()
+            location_data = get_current_location_cached()
             if location_data:
                 st.success(f"Location updated: {location_data['latitude']:.4f}, {location_data['longitude']:.4f}")
     
@@ -444,7 +590,7 @@ if page == "🏠 Home":
     st.markdown("<h2 class='sub-header'>Safety Map</h2>", unsafe_allow_html=True)
     
     # Get current location
-    location_data = get_current_location()
+    location_data = get_current_location_cached()
     
     # Create a map centered at user's location
     m = get_map(st.session_state.user_location["latitude"], 
@@ -455,7 +601,7 @@ if page == "🏠 Home":
         location=[st.session_state.user_location["latitude"], 
                  st.session_state.user_location["longitude"]],
         popup="Your Location",
-        icon=folium.Icon(color="blue", icon="user")
+        icon=folium.Icon(**_ICON_USER)
     ).add_to(m)
     
     # Add some sample data points
@@ -490,7 +636,8 @@ if page == "🏠 Home":
     ).add_to(m)
     
     # Display the map
-    folium_static(m)
+    show_map(m, ("home", st.session_state.user_location["latitude"],
+                 st.session_state.user_location["longitude"]))
     
     # Recent activity
     st.markdown("<h2 class='sub-header'>Recent Activity</h2>", unsafe_allow_html=True)
@@ -514,9 +661,10 @@ elif page == "📍 Live Location Tracking":
     if st.session_state.location_tracking:
         update_tracked_location()
     
-    tabs = st.tabs(["My Location", "Location Sharing", "Track History"])
+    # Only the selected view runs, so hidden views don't build maps or query the database
+    tab = st.radio("View", ["My Location", "Location Sharing", "Track History"], horizontal=True, label_visibility="collapsed", key="tracking_tab")
     
-    with tabs[0]:
+    if tab == "My Location":
         st.markdown("### Current Location")
         st.markdown("View and update your current location.")
         
@@ -540,7 +688,7 @@ elif page == "📍 Live Location Tracking":
         with col2:
             if st.button("Get Current Location"):
                 with st.spinner("Getting your location..."):
-                    location_data = get_current_location()
+                    location_data = get_current_location_cached()
                     if location_data:
                         st.success(f"Location updated: {location_data['latitude']:.4f}, {location_data['longitude']:.4f}")
                         st.rerun()
@@ -602,7 +750,7 @@ elif page == "📍 Live Location Tracking":
             location=[st.session_state.user_location["latitude"], 
                      st.session_state.user_location["longitude"]],
             popup="Your Current Location",
-            icon=folium.Icon(color="blue", icon="user")
+            icon=folium.Icon(**_ICON_USER)
         ).add_to(m)
         
         # Add accuracy circle if available
@@ -619,7 +767,9 @@ elif page == "📍 Live Location Tracking":
             ).add_to(m)
         
         # Display the map
-        folium_static(m)
+        show_map(m, ("location", st.session_state.user_location["latitude"],
+                     st.session_state.user_location["longitude"],
+                     st.session_state.location_history[-1].get("accuracy") if st.session_state.location_history else None))
         
         # Location tracking status
         if st.session_state.location_tracking:
@@ -634,7 +784,7 @@ elif page == "📍 Live Location Tracking":
         else:
             st.warning("⚠️ Location tracking is not active. Click 'Start Location Tracking' to enable automatic updates.")
     
-    with tabs[1]:
+    elif tab == "Location Sharing":
         st.markdown("### Share Your Location")
         st.markdown("Share your real-time location with trusted contacts.")
         
@@ -698,21 +848,15 @@ elif page == "📍 Live Location Tracking":
                     if selected_contacts:
                         sharing_link = generate_location_sharing_link()
                         
+                        # Create message
+                        message = f"I'm sharing my live location with you. Use this code to track me: {st.session_state.location_sharing_code}\nOr click this link: {sharing_link}"
+                        
+                        # Find the selected contacts
+                        contacts_by_name = {c["name"]: c for c in emergency_contacts}
+                        contacts = [contacts_by_name[name] for name in selected_contacts if name in contacts_by_name]
+                        
                         # Send SMS to each selected contact
-                        sent_count = 0
-                        for contact_name in selected_contacts:
-                            # Find the contact in the list
-                            contact = next((c for c in emergency_contacts if c["name"] == contact_name), None)
-                            
-                            if contact:
-                                # Create message
-                                message = f"I'm sharing my live location with you. Use this code to track me: {st.session_state.location_sharing_code}\nOr click this link: {sharing_link}"
-                                
-                                # Send SMS
-                                result = sms_service.send_sms(contact["phone"], message)
-                                
-                                if result["status"] in ["sent", "simulated"]:
-                                    sent_count += 1
+                        sent_count = send_sms_to_contacts(contacts, message)
                         
                         st.success(f"Location sharing information sent to {sent_count} contacts!")
                     else:
@@ -722,7 +866,7 @@ elif page == "📍 Live Location Tracking":
         else:
             st.info("Location sharing is not active. Click 'Start Location Sharing' to share your location with trusted contacts.")
     
-    with tabs[2]:
+    elif tab == "Track History":
         st.markdown("### Location History")
         st.markdown("View your location history and movement patterns.")
         
@@ -737,14 +881,15 @@ elif page == "📍 Live Location Tracking":
             m = get_map(avg_lat, avg_lng, zoom=14)
             
             # Add markers for each point
+            Marker = folium.Marker
+            last_index = len(st.session_state.location_history) - 1
             for i, point in enumerate(st.session_state.location_history):
                 # Only add markers for every 5th point to avoid clutter
-                if i % 5 == 0 or i == len(st.session_state.location_history) - 1:
-                    folium.Marker(
+                if i % 5 == 0 or i == last_index:
+                    Marker(
                         location=[point["latitude"], point["longitude"]],
                         popup=f"Time: {point['timestamp'].split('T')[1].split('.')[0]}",
-                        icon=folium.Icon(color="blue" if i < len(st.session_state.location_history) - 1 else "red", 
-                                        icon="record" if i < len(st.session_state.location_history) - 1 else "user")
+                        icon=folium.Icon(**(_ICON_TRAIL if i < last_index else _ICON_TRAIL_LAST))
                     ).add_to(m)
             
             # Add a line connecting all points
@@ -756,7 +901,10 @@ elif page == "📍 Live Location Tracking":
             ).add_to(m)
             
             # Display the map
-            folium_static(m)
+            show_map(m, ("history", hash(tuple(
+                (point["latitude"], point["longitude"], point["timestamp"])
+                for point in st.session_state.location_history
+            ))))
             
             # Display history table
             st.markdown("### Location Data")
@@ -786,9 +934,9 @@ elif page == "📍 Live Location Tracking":
 elif page == "🚨 Emergency Alert System":
     st.markdown("<h2 class='sub-header'>Emergency Alert System</h2>", unsafe_allow_html=True)
     
-    tabs = st.tabs(["Create Alert", "View Alerts", "Verify Alerts"])
+    tab = st.radio("View", ["Create Alert", "View Alerts", "Verify Alerts"], horizontal=True, label_visibility="collapsed", key="alerts_tab")
     
-    with tabs[0]:
+    if tab == "Create Alert":
         st.markdown("### Report an Emergency")
         st.markdown("Create an alert to notify authorities and nearby users about a safety concern.")
         
@@ -801,7 +949,7 @@ elif page == "🚨 Emergency Alert System":
         # Get current location button
         if st.button("Use My Current Location"):
             with st.spinner("Getting your location..."):
-                location_data = get_current_location()
+                location_data = get_current_location_cached()
                 if location_data:
                     st.success(f"Location updated: {location_data['latitude']:.4f}, {location_data['longitude']:.4f}")
                     st.rerun()
@@ -822,9 +970,9 @@ elif page == "🚨 Emergency Alert System":
         folium.Marker(
             location=[latitude, longitude],
             popup="Alert Location",
-            icon=folium.Icon(color="red", icon="warning-sign")
+            icon=folium.Icon(**_ALERT_ICONS["red"])
         ).add_to(alert_map)
-        folium_static(alert_map)
+        show_map(alert_map, ("alert", latitude, longitude))
         
         severity = st.select_slider("Severity", options=["low", "medium", "high"], value="medium")
         
@@ -841,13 +989,13 @@ elif page == "🚨 Emergency Alert System":
             
             if response["status"] == "success":
                 st.success(f"Alert created successfully! Alert ID: {response['alert_id']}")
-                st.session_state.alerts.append({
+                st.session_state.alerts[response["alert_id"]] = {
                     "id": response["alert_id"],
                     "type": alert_type,
                     "description": alert_description,
                     "severity": severity,
                     "timestamp": datetime.now().isoformat()
-                })
+                }
                 
                 # Show notification details
                 st.markdown("### Alert Notifications")
@@ -856,7 +1004,7 @@ elif page == "🚨 Emergency Alert System":
             else:
                 st.error("Failed to create alert. Please try again.")
     
-    with tabs[1]:
+    elif tab == "View Alerts":
         st.markdown("### Active Alerts")
         st.markdown("View alerts in your area and get safety information.")
         
@@ -866,7 +1014,7 @@ elif page == "🚨 Emergency Alert System":
         # Get current location button
         if st.button("Use My Current Location", key="view_use_current"):
             with st.spinner("Getting your location..."):
-                location_data = get_current_location()
+                location_data = get_current_location_cached()
                 if location_data:
                     st.success(f"Location updated: {location_data['latitude']:.4f}, {location_data['longitude']:.4f}")
                     st.rerun()
@@ -876,105 +1024,115 @@ elif page == "🚨 Emergency Alert System":
                                            key="view_location_search",
                                            help="Enter a location to search")
         
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            view_latitude = st.number_input("Latitude", value=st.session_state.user_location["latitude"], format="%.6f", key="view_lat")
-        with col2:
-            view_longitude = st.number_input("Longitude", value=st.session_state.user_location["longitude"], format="%.6f", key="view_lng")
-        with col3:
-            radius = st.number_input("Radius (km)", value=5.0, min_value=0.1, max_value=50.0)
-        
-        if st.button("Get Alerts"):
-            location = {"latitude": view_latitude, "longitude": view_longitude}
+        # Search results render in a fragment so Get Alerts reruns only this region
+        @st.fragment
+        def render_active_alerts():
+            # Bind the folium constructors used in the marker loop as fast locals
+            Marker, Circle = folium.Marker, folium.Circle
             
-            with st.spinner("Fetching alerts..."):
-                alerts = handlers["alert_handler"].get_active_alerts(view_latitude, view_longitude, radius)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                view_latitude = st.number_input("Latitude", value=st.session_state.user_location["latitude"], format="%.6f", key="view_lat")
+            with col2:
+                view_longitude = st.number_input("Longitude", value=st.session_state.user_location["longitude"], format="%.6f", key="view_lng")
+            with col3:
+                radius = st.number_input("Radius (km)", value=5.0, min_value=0.1, max_value=50.0)
             
-            if alerts:
-                # Create a map
-                m = get_map(view_latitude, view_longitude, zoom=13)
+            if st.button("Get Alerts"):
+                location = {"latitude": view_latitude, "longitude": view_longitude}
                 
-                # Add user location marker
-                folium.Marker(
-                    location=[view_latitude, view_longitude],
-                    popup="Your Location",
-                    icon=folium.Icon(color="blue", icon="user")
-                ).add_to(m)
-                
-                # Add circle for search radius
-                folium.Circle(
-                    location=[view_latitude, view_longitude],
-                    radius=radius * 1000,  # Convert to meters
-                    color='blue',
-                    fill=False,
-                    popup="Search Radius"
-                ).add_to(m)
+                with st.spinner("Fetching alerts..."):
+                    alerts = handlers["alert_handler"].get_active_alerts(view_latitude, view_longitude, radius)
                 
-                # Add alert markers
-                for alert in alerts:
-                    color = "red" if alert["severity"] == "high" else "orange" if alert["severity"] == "medium" else "green"
-                    folium.Marker(
-                        location=[alert["latitude"], alert["longitude"]],
-                        popup=f"{alert['alert_type']} - {alert['description']}",
-                        tooltip=f"{alert['severity'].upper()} - {alert['alert_type']}",
-                        icon=folium.Icon(color=color, icon="warning-sign")
+                if alerts:
+                    # Create a map
+                    m = get_map(view_latitude, view_longitude, zoom=13)
+                    
+                    # Add user location marker
+                    Marker(
+                        location=[view_latitude, view_longitude],
+                        popup="Your Location",
+                        icon=folium.Icon(**_ICON_USER)
                     ).add_to(m)
-                
-                # Display the map
-                folium_static(m)
-                
-                # Display alerts in a table
-                st.markdown("### Alert Details")
-                
-                for alert in alerts:
-                    severity_class = "danger-area" if alert["severity"] == "high" else "warning-area" if alert["severity"] == "medium" else "safe-area"
                     
-                    st.markdown(f"""
-                    <div class='card'>
-                        <h4 class='{severity_class}'>{alert['severity'].upper()} - {alert['alert_type']}</h4>
-                        <p>{alert['description']}</p>
-                        <p class='info-text'>Distance: {alert.get('distance_km', 'N/A')} km • Reported: {alert['created_at']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-            else:
-                st.info("No active alerts in this area.")
+                    # Add circle for search radius
+                    Circle(
+                        location=[view_latitude, view_longitude],
+                        radius=radius * 1000,  # Convert to meters
+                        color='blue',
+                        fill=False,
+                        popup="Search Radius"
+                    ).add_to(m)
+                    
+                    # Add alert markers
+                    for alert in alerts:
+                        Marker(
+                            location=[alert["latitude"], alert["longitude"]],
+                            popup=f"{alert['alert_type']} - {alert['description']}",
+                            tooltip=f"{alert['severity'].upper()} - {alert['alert_type']}",
+                            icon=folium.Icon(**_ALERT_ICONS[_SEV_COLOR.get(alert["severity"], "green")])
+                        ).add_to(m)
+                    
+                    # Display the map
+                    show_map(m, ("alerts", view_latitude, view_longitude, radius,
+                                 tuple((alert["id"], alert["severity"]) for alert in alerts)))
+                    
+                    # Display alerts in a table
+                    st.markdown("### Alert Details")
+                    
+                    for alert in alerts:
+                        st.markdown(_CARD.format_map({
+                            "cls": _SEV_CLASS.get(alert["severity"], "safe-area"),
+                            "title": f"{alert['severity'].upper()} - {alert['alert_type']}",
+                            "desc": alert["description"],
+                            "meta": f"Distance: {alert.get('distance_km', 'N/A')} km • Reported: {alert['created_at']}"
+                        }), unsafe_allow_html=True)
+                else:
+                    st.info("No active alerts in this area.")
+        
+        render_active_alerts()
     
-    with tabs[2]:
+    elif tab == "Verify Alerts":
         st.markdown("### Verify Alerts")
         st.markdown("Help verify alerts to prevent false alarms and improve community safety.")
         
-        # Display alerts that can be verified
-        if st.session_state.alerts:
-            for i, alert in enumerate(st.session_state.alerts):
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    st.markdown(f"""
-                    <div class='card'>
-                        <h4>{alert['type']}</h4>
-                        <p>{alert['description']}</p>
-                        <p class='info-text'>Severity: {alert['severity']} • Reported: {alert['timestamp']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+        # Each alert renders in its own fragment so Confirm/Dispute rerun only that alert
+        @st.fragment
+        def render_verify(alert_id, alert):
+            col1, col2 = st.columns([3, 1])
+            
+            with col1:
+                st.markdown(_CARD.format_map({
+                    "cls": "",
+                    "title": alert["type"],
+                    "desc": alert["description"],
+                    "meta": f"Severity: {alert['severity']} • Reported: {alert['timestamp']}"
+                }), unsafe_allow_html=True)
+            
+            with col2:
+                if st.button("Confirm", key=f"confirm_{alert_id}"):
+                    with st.spinner("Verifying alert..."):
+                        response = handlers["alert_handler"].verify_alert(alert_id, st.session_state.user_id, "confirm")
+                    
+                    if response["status"] == "success":
+                        st.session_state.alerts[alert_id]["severity"] = response["severity"]
+                        st.success(response["message"])
+                    else:
+                        st.error("Verification failed. Please try again.")
                 
-                with col2:
-                    if st.button("Confirm", key=f"confirm_{i}"):
-                        with st.spinner("Verifying alert..."):
-                            response = handlers["alert_handler"].verify_alert(alert["id"], st.session_state.user_id, "confirm")
-                        
-                        if response["status"] == "success":
-                            st.success(response["message"])
-                        else:
-                            st.error("Verification failed. Please try again.")
+                if st.button("Dispute", key=f"dispute_{alert_id}"):
+                    with st.spinner("Disputing alert..."):
+                        response = handlers["alert_handler"].verify_alert(alert_id, st.session_state.user_id, "dispute")
                     
-                    if st.button("Dispute", key=f"dispute_{i}"):
-                        with st.spinner("Disputing alert..."):
-                            response = handlers["alert_handler"].verify_alert(alert["id"], st.session_state.user_id, "dispute")
-                        
-                        if response["status"] == "success":
-                            st.success(response["message"])
-                        else:
-                            st.error("Dispute failed. Please try again.")
+                    if response["status"] == "success":
+                        st.success(response["message"])
+                    else:
+                        st.error("Dispute failed. Please try again.")
+        
+        # Display alerts that can be verified
+        if st.session_state.alerts:
+            for alert_id, alert in st.session_state.alerts.items():
+                render_verify(alert_id, alert)
         else:
             st.info("No alerts available for verification.")
 
@@ -982,9 +1140,9 @@ elif page == "🚨 Emergency Alert System":
 elif page == "🧭 Personalized Safety Navigator":
     st.markdown("<h2 class='sub-header'>Personalized Safety Navigator</h2>", unsafe_allow_html=True)
     
-    tabs = st.tabs(["Start Journey", "Active Journey", "Emergency"])
+    tab = st.radio("View", ["Start Journey", "Active Journey", "Emergency"], horizontal=True, label_visibility="collapsed", key="navigator_tab")
     
-    with tabs[0]:
+    if tab == "Start Journey":
         st.markdown("### Plan Your Journey")
         st.markdown("Get personalized safety recommendations for your journey.")
         
@@ -1049,7 +1207,7 @@ elif page == "🧭 Personalized Safety Navigator":
             # Get current location button
             if st.button("Use My Current Location", key="start_use_current"):
                 with st.spinner("Getting your location..."):
-                    location_data = get_current_location()
+                    location_data = get_current_location_cached()
                     if location_data:
                         st.success(f"Starting location updated: {location_data['latitude']:.4f}, {location_data['longitude']:.4f}")
                         st.rerun()
@@ -1092,22 +1250,24 @@ elif page == "🧭 Personalized Safety Navigator":
             folium.Marker(
                 location=[start_lat, start_lng],
                 popup="Starting Point",
-                icon=folium.Icon(color="green", icon="play")
+                icon=folium.Icon(**_ICON_START)
             ).add_to(m)
             
             folium.Marker(
                 location=[dest_lat, dest_lng],
                 popup="Destination",
-                icon=folium.Icon(color="red", icon="flag")
+                icon=folium.Icon(**_ICON_DESTINATION)
             ).add_to(m)
             
-            # Get route points
-            route_points = get_directions(origin, destination, travel_mode)
+            # Get route points (no routing needed when start and destination coincide)
+            if abs(start_lat - dest_lat) < 1e-4 and abs(start_lng - dest_lng) < 1e-4:
+                route_points = np.array([[start_lat, start_lng], [dest_lat, dest_lng]])
+            else:
+                route_points = get_directions(origin, destination, travel_mode)
             
             # Add route line
-            route_coords = [[point["lat"], point["lng"]] for point in route_points]
             folium.PolyLine(
-                locations=route_coords,
+                locations=route_points.tolist(),
                 color="blue",
                 weight=3,
                 opacity=0.7
@@ -1133,7 +1293,7 @@ elif page == "🧭 Personalized Safety Navigator":
             ).add_to(m)
             
             # Display the map
-            folium_static(m)
+            show_map(m, ("plan", start_lat, start_lng, dest_lat, dest_lng, travel_mode))
             
             if st.button("Start Journey", type="primary"):
                 # Start location tracking if enabled
@@ -1165,7 +1325,7 @@ elif page == "🧭 Personalized Safety Navigator":
                     
                     # Display safety information
                     safety_level = response["route_safety"]["overall_risk"]
-                    safety_class = "danger-area" if safety_level == "high" else "warning-area" if safety_level == "medium" else "safe-area"
+                    safety_class = _SEV_CLASS.get(safety_level, "safe-area")
                     
                     st.markdown(f"""
                     <div class='card'>
@@ -1181,7 +1341,7 @@ elif page == "🧭 Personalized Safety Navigator":
                 else:
                     st.error("Failed to start journey. Please try again.")
     
-    with tabs[1]:
+    elif tab == "Active Journey":
         st.markdown("### Active Journey")
         
         if st.session_state.active_journey:
@@ -1203,7 +1363,7 @@ elif page == "🧭 Personalized Safety Navigator":
             # Get current location button
             if st.button("Use My Current Location", key="journey_use_current"):
                 with st.spinner("Getting your location..."):
-                    location_data = get_current_location()
+                    location_data = get_current_location_cached()
                     if location_data:
                         st.success(f"Location updated: {location_data['latitude']:.4f}, {location_data['longitude']:.4f}")
                         st.rerun()
@@ -1225,19 +1385,19 @@ elif page == "🧭 Personalized Safety Navigator":
             folium.Marker(
                 location=[journey["start"]["latitude"], journey["start"]["longitude"]],
                 popup="Starting Point",
-                icon=folium.Icon(color="green", icon="play")
+                icon=folium.Icon(**_ICON_START)
             ).add_to(m)
             
             folium.Marker(
                 location=[current_lat, current_lng],
                 popup="Current Location",
-                icon=folium.Icon(color="blue", icon="user")
+                icon=folium.Icon(**_ICON_USER)
             ).add_to(m)
             
             folium.Marker(
                 location=[journey["destination"]["latitude"], journey["destination"]["longitude"]],
                 popup="Destination",
-                icon=folium.Icon(color="red", icon="flag")
+                icon=folium.Icon(**_ICON_DESTINATION)
             ).add_to(m)
             
             # Get route points
@@ -1248,9 +1408,8 @@ elif page == "🧭 Personalized Safety Navigator":
             )
             
             # Add route line
-            route_coords = [[point["lat"], point["lng"]] for point in route_points]
             folium.PolyLine(
-                locations=route_coords,
+                locations=route_points.tolist(),
                 color="blue",
                 weight=3,
                 opacity=0.7
@@ -1262,9 +1421,8 @@ elif page == "🧭 Personalized Safety Navigator":
                 journey["destination"],
                 journey["travel_mode"]
             )
-            current_to_dest_coords = [[point["lat"], point["lng"]] for point in current_to_dest]
             folium.PolyLine(
-                locations=current_to_dest_coords,
+                locations=current_to_dest.tolist(),
                 color="green",
                 weight=3,
                 opacity=0.7,
@@ -1272,7 +1430,7 @@ elif page == "🧭 Personalized Safety Navigator":
             ).add_to(m)
             
             # Display the map
-            folium_static(m)
+            show_map(m, ("journey", journey["id"], current_lat, current_lng))
             
             # Location tracking status
             if st.session_state.location_tracking:
@@ -1298,15 +1456,12 @@ elif page == "🧭 Personalized Safety Navigator":
                     if response["nearby_risks"]:
                         st.markdown("### Nearby Risks")
                         for risk in response["nearby_risks"]:
-                            risk_class = "danger-area" if risk["risk_level"] == "high" else "warning-area" if risk["risk_level"] == "medium" else "safe-area"
-                            
-                            st.markdown(f"""
-                            <div class='card'>
-                                <h4 class='{risk_class}'>{risk["risk_level"].upper()} Risk Area</h4>
-                                <p>{risk["reason"]}</p>
-                                <p class='info-text'>Distance: {risk["distance_km"]} km</p>
-                            </div>
-                            """, unsafe_allow_html=True)
+                            st.markdown(_CARD.format_map({
+                                "cls": _SEV_CLASS.get(risk["risk_level"], "safe-area"),
+                                "title": f"{risk['risk_level'].upper()} Risk Area",
+                                "desc": risk["reason"],
+                                "meta": f"Distance: {risk['distance_km']} km"
+                            }), unsafe_allow_html=True)
                     else:
                         st.info("No risks detected in your current area.")
                     
@@ -1314,14 +1469,12 @@ elif page == "🧭 Personalized Safety Navigator":
                     if response["alerts"]:
                         st.markdown("### Safety Alerts")
                         for alert in response["alerts"]:
-                            alert_class = "danger-area" if alert["risk_level"] == "high" else "warning-area" if alert["risk_level"] == "medium" else "safe-area"
-                            
-                            st.markdown(f"""
-                            <div class='card'>
-                                <h4 class='{alert_class}'>{alert["type"]}</h4>
-                                <p>{alert["message"]}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
+                            st.markdown(_CARD.format_map({
+                                "cls": _SEV_CLASS.get(alert["risk_level"], "safe-area"),
+                                "title": alert["type"],
+                                "desc": alert["message"],
+                                "meta": ""
+                            }), unsafe_allow_html=True)
                     
                     # Check if destination reached
                     if response["destination_reached"]:
@@ -1371,20 +1524,14 @@ elif page == "🧭 Personalized Safety Navigator":
                             )
                             
                             # Create message
-                            message = f"I'm currently on a journey. My current location is: {current_lat:.4f}, {current_lng:.4f}. I'm {distance_to_dest:.2f} km away from my destination. View my location: https://www.openstreetmap.org/?mlat={current_lat}&mlon={current_lng}#map=15/{current_lat}/{current_lng}"
+                            message = _JOURNEY_MSG_TPL.format(lat=current_lat, lng=current_lng, dist=distance_to_dest)
+                            
+                            # Find the selected contacts
+                            contacts_by_name = {c["name"]: c for c in emergency_contacts}
+                            contacts = [contacts_by_name[name] for name in selected_contacts if name in contacts_by_name]
                             
                             # Send SMS to each selected contact
-                            sent_count = 0
-                            for contact_name in selected_contacts:
-                                # Find the contact in the list
-                                contact = next((c for c in emergency_contacts if c["name"] == contact_name), None)
-                                
-                                if contact:
-                                    # Send SMS
-                                    result = sms_service.send_sms(contact["phone"], message)
-                                    
-                                    if result["status"] in ["sent", "simulated"]:
-                                        sent_count += 1
+                            sent_count = send_sms_to_contacts(contacts, message)
                             
                             st.success(f"Journey status sent to {sent_count} contacts!")
                         else:
@@ -1410,7 +1557,7 @@ elif page == "🧭 Personalized Safety Navigator":
         else:
             st.info("No active journey. Start a journey from the 'Start Journey' tab.")
     
-    with tabs[2]:
+    elif tab == "Emergency":
         st.markdown("### Emergency Mode")
         st.markdown("Activate emergency mode to alert your contacts and authorities.")
         
@@ -1425,7 +1572,7 @@ elif page == "🧭 Personalized Safety Navigator":
             # Get current location button
             if st.button("Use My Current Location", key="emergency_use_current"):
                 with st.spinner("Getting your location..."):
-                    location_data = get_current_location()
+                    location_data = get_current_location_cached()
                     if location_data:
                         st.success(f"Location updated: {location_data['latitude']:.4f}, {location_data['longitude']:.4f}")
                         st.rerun()
@@ -1439,9 +1586,9 @@ elif page == "🧭 Personalized Safety Navigator":
             folium.Marker(
                 location=[current_lat, current_lng],
                 popup="Your Location",
-                icon=folium.Icon(color="red", icon="exclamation")
+                icon=folium.Icon(**_ICON_EMERGENCY)
             ).add_to(emergency_map)
-            folium_static(emergency_map)
+            show_map(emergency_map, ("emergency", current_lat, current_lng))
             
             if st.button("TRIGGER EMERGENCY", type="primary"):
                 emergency_details = {
@@ -1471,9 +1618,10 @@ elif page == "🧭 Personalized Safety Navigator":
                     # Show notification details
                     if "notification_results" in response:
                         st.markdown("### Notification Details")
-                        for result in response["notification_results"]:
-                            status_icon = "✅" if result["status"] in ["sent", "simulated"] else "❌"
-                            st.markdown(f"{status_icon} **{result['contact_name']}**: {result['contact_phone']}")
+                        st.markdown("\n\n".join(
+                            f"{'✅' if result['status'] in ['sent', 'simulated'] else '❌'} **{result['contact_name']}**: {result['contact_phone']}"
+                            for result in response["notification_results"]
+                        ))
                 else:
                     st.error("Failed to activate emergency mode. Please try again.")
         else:
@@ -1486,33 +1634,39 @@ elif page == "🧭 Personalized Safety Navigator":
             # Get current location button
             if st.button("Use My Current Location", key="quick_emergency_use_current"):
                 with st.spinner("Getting your location..."):
-                    location_data = get_current_location()
+                    location_data = get_current_location_cached()
                     if location_data:
                         st.success(f"Location updated: {location_data['latitude']:.4f}, {location_data['longitude']:.4f}")
                         st.rerun()
             
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                quick_lat = st.number_input("Your Latitude", value=st.session_state.user_location["latitude"], format="%.6f")
-            with col2:
-                quick_lng = st.number_input("Your Longitude", value=st.session_state.user_location["longitude"], format="%.6f")
+            # Inputs live in forms so typing doesn't rerun the page on every keystroke
+            with st.form("quick_location_form"):
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    quick_lat = st.number_input("Your Latitude", value=st.session_state.user_location["latitude"], format="%.6f")
+                with col2:
+                    quick_lng = st.number_input("Your Longitude", value=st.session_state.user_location["longitude"], format="%.6f")
+                
+                quick_description = st.text_area("Emergency Description", placeholder="Describe your emergency situation...")
+                
+                # Preview only redraws the map, so edited coordinates can be checked before sending
+                st.form_submit_button("Preview Location")
+                send_alert = st.form_submit_button("SEND EMERGENCY ALERT", type="primary")
             
             # Update user location in session state
             st.session_state.user_location = {"latitude": quick_lat, "longitude": quick_lng}
             
-            quick_description = st.text_area("Emergency Description", placeholder="Describe your emergency situation...")
-            
             # Show location on map
             quick_map = get_map(quick_lat, quick_lng, zoom=15)
             folium.Marker(
                 location=[quick_lat, quick_lng],
                 popup="Your Location",
-                icon=folium.Icon(color="red", icon="exclamation")
+                icon=folium.Icon(**_ICON_EMERGENCY)
             ).add_to(quick_map)
-            folium_static(quick_map)
+            show_map(quick_map, ("quick_emergency", quick_lat, quick_lng))
             
-            if st.button("SEND EMERGENCY ALERT", type="primary"):
+            if send_alert:
                 # Create an emergency alert
                 alert_data = {
                     "type": "emergency",
@@ -1521,6 +1675,20 @@ elif page == "🧭 Personalized Safety Navigator":
                     "severity": "high"
                 }
                 
+                # Start notifying emergency contacts first so the SMS go out while the alert is created
+                emergency_contacts = db.get_emergency_contacts(st.session_state.user_id)
+                
+                if emergency_contacts:
+                    submit_sos_notifications(
+                        "emergency",
+                        user_name="User",  # In a real app, get the user's name
+                        location={"latitude": quick_lat, "longitude": quick_lng},
+                        message=f"EMERGENCY! {quick_description}",
+                        emergency_contacts=emergency_contacts
+                    )
+                    
+                    st.toast(f"Notifying {len(emergency_contacts)} emergency contacts in the background...")
+                
                 with st.spinner("Sending emergency alert..."):
                     response = handlers["alert_handler"].create_alert(st.session_state.user_id, alert_data)
                 
@@ -1534,19 +1702,6 @@ elif page == "🧭 Personalized Safety Navigator":
                         <p>Users Notified: {response["users_notified"]}</p>
                     </div>
                     """, unsafe_allow_html=True)
-                    
-                    # Also send to emergency contacts
-                    emergency_contacts = db.get_emergency_contacts(st.session_state.user_id)
-                    
-                    if emergency_contacts:
-                        notification_results = sms_service.send_sos_notifications(
-                            user_name="User",  # In a real app, get the user's name
-                            location={"latitude": quick_lat, "longitude": quick_lng},
-                            message=f"EMERGENCY! {quick_description}",
-                            emergency_contacts=emergency_contacts
-                        )
-                        
-                        st.success(f"Emergency alert also sent to {len(notification_results)} emergency contacts!")
                 else:
                     st.error("Failed to send emergency alert. Please try again.")
 
@@ -1554,9 +1709,9 @@ elif page == "🧭 Personalized Safety Navigator":
 elif page == "📝 Anonymous Incident Reporting":
     st.markdown("<h2 class='sub-header'>Anonymous Incident Reporting</h2>", unsafe_allow_html=True)
     
-    tabs = st.tabs(["Submit Report", "View Reports", "Get Support"])
+    tab = st.radio("View", ["Submit Report", "View Reports", "Get Support"], horizontal=True, label_visibility="collapsed", key="reports_tab")
     
-    with tabs[0]:
+    if tab == "Submit Report":
         st.markdown("### Report an Incident")
         st.markdown("Submit an anonymous report about a safety concern or incident.")
         
@@ -1568,7 +1723,7 @@ elif page == "📝 Anonymous Incident Reporting":
         # Get current location button
         if st.button("Use My Current Location", key="incident_use_current"):
             with st.spinner("Getting your location..."):
-                location_data = get_current_location()
+                location_data = get_current_location_cached()
                 if location_data:
                     st.success(f"Location updated: {location_data['latitude']:.4f}, {location_data['longitude']:.4f}")
                     st.rerun()
@@ -1578,27 +1733,31 @@ elif page == "📝 Anonymous Incident Reporting":
                                                key="incident_location_search",
                                                help="Enter a location to search")
         
-        col1, col2 = st.columns(2)
-        with col1:
-            incident_lat = st.number_input("Incident Latitude", value=st.session_state.user_location["latitude"], format="%.6f")
-        with col2:
-            incident_lng = st.number_input("Incident Longitude", value=st.session_state.user_location["longitude"], format="%.6f")
+        with st.form("incident_location_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                incident_lat = st.number_input("Incident Latitude", value=st.session_state.user_location["latitude"], format="%.6f")
+            with col2:
+                incident_lng = st.number_input("Incident Longitude", value=st.session_state.user_location["longitude"], format="%.6f")
+            
+            st.markdown("""
+            <p class='info-text'>Your report will be anonymized to protect your identity. 
+            Personal information like names, phone numbers, and email addresses will be removed.</p>
+            """, unsafe_allow_html=True)
+            
+            st.form_submit_button("Preview Location")
+            submit_report = st.form_submit_button("Submit Report", type="primary")
         
         # Show location on map
         incident_map = get_map(incident_lat, incident_lng, zoom=15)
         folium.Marker(
             location=[incident_lat, incident_lng],
             popup="Incident Location",
-            icon=folium.Icon(color="orange", icon="info-sign")
+            icon=folium.Icon(**_ICON_REPORT)
         ).add_to(incident_map)
-        folium_static(incident_map)
-        
-        st.markdown("""
-        <p class='info-text'>Your report will be anonymized to protect your identity. 
-        Personal information like names, phone numbers, and email addresses will be removed.</p>
-        """, unsafe_allow_html=True)
+        show_map(incident_map, ("incident", incident_lat, incident_lng))
         
-        if st.button("Submit Report", type="primary"):
+        if submit_report:
             with st.spinner("Processing report..."):
                 response = handlers["incident_handler"].submit_report(
                     st.session_state.user_id,
@@ -1608,6 +1767,7 @@ elif page == "📝 Anonymous Incident Reporting":
             
             if "report_id" in response:
                 st.success("Report submitted successfully!")
+                get_cached_reports.clear()
                 
                 # Store report in session state
                 st.session_state.reports.append({
@@ -1620,7 +1780,7 @@ elif page == "📝 Anonymous Incident Reporting":
                 })
                 
                 # Display report details
-                severity_class = "danger-area" if response["severity"] == "high" else "warning-area" if response["severity"] == "medium" else "safe-area"
+                severity_class = _SEV_CLASS.get(response["severity"], "safe-area")
                 
                 st.markdown(f"""
                 <div class='card'>
@@ -1637,7 +1797,7 @@ elif page == "📝 Anonymous Incident Reporting":
             else:
                 st.error("Failed to submit report. Please try again.")
     
-    with tabs[1]:
+    elif tab == "View Reports":
         st.markdown("### View Reports")
         st.markdown("View anonymized reports in your area to stay informed about safety concerns.")
         
@@ -1647,7 +1807,7 @@ elif page == "📝 Anonymous Incident Reporting":
         # Get current location button
         if st.button("Use My Current Location", key="view_report_use_current"):
             with st.spinner("Getting your location..."):
-                location_data = get_current_location()
+                location_data = get_current_location_cached()
                 if location_data:
                     st.success(f"Location updated: {location_data['latitude']:.4f}, {location_data['longitude']:.4f}")
                     st.rerun()
@@ -1657,17 +1817,20 @@ elif page == "📝 Anonymous Incident Reporting":
                                                   key="view_report_location_search",
                                                   help="Enter a location to search")
         
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            view_report_lat = st.number_input("Latitude", value=st.session_state.user_location["latitude"], format="%.6f", key="view_report_lat")
-        with col2:
-            view_report_lng = st.number_input("Longitude", value=st.session_state.user_location["longitude"], format="%.6f", key="view_report_lng")
-        with col3:
-            report_radius = st.number_input("Radius (km)", value=5.0, min_value=0.1, max_value=50.0)
+        with st.form("view_report_form"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                view_report_lat = st.number_input("Latitude", value=st.session_state.user_location["latitude"], format="%.6f", key="view_report_lat")
+            with col2:
+                view_report_lng = st.number_input("Longitude", value=st.session_state.user_location["longitude"], format="%.6f", key="view_report_lng")
+            with col3:
+                report_radius = st.number_input("Radius (km)", value=5.0, min_value=0.1, max_value=50.0)
+            
+            submitted = st.form_submit_button("Get Reports")
         
-        if st.button("Get Reports"):
+        if submitted:
             with st.spinner("Fetching reports..."):
-                reports = handlers["incident_handler"].get_reports_by_area(view_report_lat, view_report_lng, report_radius)
+                reports = get_cached_reports(view_report_lat, view_report_lng, report_radius)
             
             if reports:
                 # Create a map
@@ -1677,7 +1840,7 @@ elif page == "📝 Anonymous Incident Reporting":
                 folium.Marker(
                     location=[view_report_lat, view_report_lng],
                     popup="Your Location",
-                    icon=folium.Icon(color="blue", icon="user")
+                    icon=folium.Icon(**_ICON_USER)
                 ).add_to(m)
                 
                 # Add circle for search radius
@@ -1689,36 +1852,42 @@ elif page == "📝 Anonymous Incident Reporting":
                     popup="Search Radius"
                 ).add_to(m)
                 
-                # Add report markers
+                # Add report markers as one clustered layer; the markers are built in the browser
+                marker_rows = []
                 for report in reports:
-                    # Create a marker for each report
-                    color = "red" if report["severity"] == "high" else "orange" if report["severity"] == "medium" else "green"
-                    folium.Marker(
-                        location=[report.get("latitude", 0), report.get("longitude", 0)],
-                        popup=f"Categories: {', '.join(report['categories'])}",
-                        tooltip=f"{report['severity'].upper()} - {', '.join(report['categories'])}",
-                        icon=folium.Icon(color=color, icon="info-sign")
-                    ).add_to(m)
+                    color = _SEV_COLOR.get(report["severity"], "green")
+                    categories = html.escape(", ".join(report["categories"]))
+                    marker_rows.append([
+                        report.get("latitude", 0),
+                        report.get("longitude", 0),
+                        color,
+                        f"Categories: {categories}",
+                        f"{html.escape(report['severity'].upper())} - {categories}"
+                    ])
+                FastMarkerCluster(marker_rows, callback=_REPORT_MARKER_CALLBACK).add_to(m)
                 
                 # Display the map
-                folium_static(m)
+                show_map(m, ("reports", view_report_lat, view_report_lng, report_radius,
+                             tuple((report["id"], report["severity"]) for report in reports)))
                 
                 # Display reports in a table
                 st.markdown("### Report Details")
                 
+                # All cards go out in a single markdown element
+                html_parts = []
                 for report in reports:
-                    severity_class = "danger-area" if report["severity"] == "high" else "warning-area" if report["severity"] == "medium" else "safe-area"
-                    
-                    st.markdown(f"""
-                    <div class='card'>
-                        <h4 class='{severity_class}'>{report['severity'].upper()} - {', '.join(report['categories'])}</h4>
-                        <p class='info-text'>Reported: {report['timestamp']} • Distance: {report.get('distance_km', 'N/A')} km</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    html_parts.append(_REPORT_CARD.format_map({
+                        "cls": _SEV_CLASS.get(report["severity"], "safe-area"),
+                        "severity": report["severity"].upper(),
+                        "categories": ", ".join(report["categories"]),
+                        "timestamp": report["timestamp"],
+                        "distance": report.get("distance_km", "N/A")
+                    }))
+                st.markdown("\n".join(html_parts), unsafe_allow_html=True)
             else:
                 st.info("No reports found in this area.")
     
-    with tabs[2]:
+    elif tab == "Get Support":
         st.markdown("### Get Community Support")
         st.markdown("Connect with verified community volunteers who can provide guidance and support.")
         
@@ -1819,6 +1988,44 @@ elif page == "👥 Emergency Contacts":
             st.success(f"Added {contact_name} as an emergency contact!")
             st.rerun()
     
+    # Bulk import
+    with st.expander("Import contacts from CSV"):
+        st.markdown("The file needs `name` and `phone` columns; `relationship` is optional.")
+        uploaded_contacts = st.file_uploader("Contacts CSV", type="csv")
+        
+        # Shown after the rerun that refreshes the contact list
+        import_message = st.session_state.pop("contacts_import_message", None)
+        if import_message:
+            st.success(import_message)
+        
+        if st.button("Import Contacts", disabled=uploaded_contacts is None):
+            try:
+                # Read everything as text so phone numbers keep their leading '+' and zeros
+                contacts_df = pd.read_csv(uploaded_contacts, dtype=str)
+            except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError) as e:
+                st.error(f"Could not read the CSV file: {e}")
+                contacts_df = None
+            else:
+                contacts_df.columns = [c.strip().lower() for c in contacts_df.columns]
+            
+            if contacts_df is not None and not {"name", "phone"}.issubset(contacts_df.columns):
+                st.error("The CSV file must have 'name' and 'phone' columns.")
+            elif contacts_df is not None:
+                if "relationship" not in contacts_df.columns:
+                    contacts_df["relationship"] = None
+                # Blank or whitespace-only values count as missing
+                for column in ("name", "phone", "relationship"):
+                    contacts_df[column] = contacts_df[column].str.strip().replace("", np.nan)
+                contacts_df = contacts_df.dropna(subset=["name", "phone"])
+                contacts_df = contacts_df.astype(object).where(contacts_df.notna(), None)
+                
+                imported = db.add_emergency_contacts_bulk(
+                    st.session_state.user_id,
+                    contacts_df[["name", "phone", "relationship"]].to_dict("records")
+                )
+                st.session_state.contacts_import_message = f"Imported {imported} emergency contacts!"
+                st.rerun()
+    
     # Display existing contacts
     st.markdown("### Your Emergency Contacts")
     
@@ -1852,24 +2059,24 @@ elif page == "👥 Emergency Contacts":
         test_message = st.text_input("Test Message", value="This is a TEST emergency alert. Please ignore.")
         
         if st.button("Send Test Alert"):
-            # Get current location
-            location_data = get_current_location()
-            
-            # Send test notifications
-            notification_results = sms_service.send_sos_notifications(
+            # Send test notifications in the background
+            submit_sos_notifications(
+                "test",
                 user_name="User",  # In a real app, get the user's name
                 location=st.session_state.user_location,
                 message=f"TEST ONLY: {test_message}",
                 emergency_contacts=emergency_contacts
             )
             
-            st.success(f"Test alert sent to {len(notification_results)} emergency contacts!")
-            
-            # Show notification details
+            st.toast(f"Sending test alert to {len(emergency_contacts)} emergency contacts in the background...")
+        
+        # Show notification details once the last test alert has finished
+        if st.session_state.last_sos_action == "test" and st.session_state.last_sos_results:
             st.markdown("### Notification Details")
-            for result in notification_results:
-                status_icon = "✅" if result["status"] in ["sent", "simulated"] else "❌"
-                st.markdown(f"{status_icon} **{result['contact_name']}**: {result['contact_phone']}")
+            st.markdown("\n\n".join(
+                f"{'✅' if result['status'] in ['sent', 'simulated'] else '❌'} **{result['contact_name']}**: {result['contact_phone']}"
+                for result in st.session_state.last_sos_results
+            ))
     else:
         st.warning("Please add emergency contacts before testing the SOS alert.")
 
@@ -1898,7 +2105,7 @@ elif page == "⚙️ Settings":
     # Get current location button
     if st.button("Get Current Location", key="settings_get_location"):
         with st.spinner("Getting your location..."):
-            location_data = get_current_location()
+            location_data = get_current_location_cached()
             if location_data:
                 st.success(f"Location updated: {location_data['latitude']:.4f}, {location_data['longitude']:.4f}")
                 st.rerun()
@@ -1908,14 +2115,17 @@ elif page == "⚙️ Settings":
                                   key="settings_location_search",
                                   help="Enter a location to search")
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        location_lat = st.number_input("Default Latitude", value=st.session_state.user_location["latitude"], format="%.6f")
-    with col2:
-        location_lng = st.number_input("Default Longitude", value=st.session_state.user_location["longitude"], format="%.6f")
+    with st.form("settings_location_form"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            location_lat = st.number_input("Default Latitude", value=st.session_state.user_location["latitude"], format="%.6f")
+        with col2:
+            location_lng = st.number_input("Default Longitude", value=st.session_state.user_location["longitude"], format="%.6f")
+        
+        submitted = st.form_submit_button("Update Default Location")
     
-    if st.button("Update Default Location"):
+    if submitted:
         st.session_state.user_location = {"latitude": location_lat, "longitude": location_lng}
         st.success("Default location updated successfully!")
     
@@ -1924,9 +2134,9 @@ elif page == "⚙️ Settings":
     folium.Marker(
         location=[location_lat, location_lng],
         popup="Your Default Location",
-        icon=folium.Icon(color="blue", icon="user")
+        icon=folium.Icon(**_ICON_USER)
     ).add_to(location_map)
-    folium_static(location_map)
+    show_map(location_map, ("settings", location_lat, location_lng))
     
     # Location tracking settings
     st.markdown("### Location Tracking Settings")
@@ -1,11 +1,86 @@
 import os
-import json
 import uuid
+import time
+import asyncio
+import orjson
+import json5
 from typing import Dict, List, Optional, Any
 from datetime import datetime
+from math import radians, cos, sin, asin, sqrt
 
 from database import Database
-from sms_service import SMSService
+from sms_service import sms_service, run_coroutine
+
+# Sample community volunteers (a real implementation would query a volunteers database)
+_ALL_VOLUNTEERS = [
+    {"id": "vol1", "name": "Support Volunteer 1", "expertise": ["harassment", "stalking"]},
+    {"id": "vol2", "name": "Support Volunteer 2", "expertise": ["physical_threat", "unsafe_environment"]},
+    {"id": "vol3", "name": "Support Volunteer 3", "expertise": ["general_concern"]}
+]
+
+# Report category -> volunteers with that expertise
+_VOLUNTEERS_BY_CATEGORY: Dict[str, List[Dict]] = {}
+for _volunteer in _ALL_VOLUNTEERS:
+    for _category in _volunteer["expertise"]:
+        _VOLUNTEERS_BY_CATEGORY.setdefault(_category, []).append(_volunteer)
+del _volunteer, _category
+
+# Bound once; handlers stamp every agent request with the local time
+_now = datetime.now
+
+def _run_agent(agent, agent_input):
+    """Call an agent, skipping the JSON round-trip when it offers a structured (dict in, dict out) entry point"""
+    run_structured = getattr(agent, "run_structured", None)
+    if run_structured is not None:
+        return run_structured(agent_input)
+    return agent.run(orjson.dumps(agent_input).decode())
+
+def _parse_agent_response(agent_response):
+    """Parse an agent's JSON reply, retrying leniently (trailing commas, comments, single quotes) if it is malformed"""
+    if isinstance(agent_response, dict):
+        return agent_response
+    try:
+        return orjson.loads(agent_response)
+    except orjson.JSONDecodeError:
+        return json5.loads(agent_response)
+
+def _uuid7() -> str:
+    """
+    Generate a time-ordered UUID (version 7) string
+    
+    The leading 48 bits are the Unix time in milliseconds, so IDs created later
+    sort later and primary-key inserts append to the end of the index.
+    """
+    unix_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (unix_ms & 0xFFFFFFFFFFFF) << 80
+        | 0x7 << 76                      # version
+        | (rand >> 68) << 64             # 12 random bits
+        | 0b10 << 62                     # RFC 4122 variant
+        | rand & 0x3FFFFFFFFFFFFFFF      # 62 random bits
+    )
+    return str(uuid.UUID(int=value))
+
+# Safety score deduction by overall route risk
+_RISK_PENALTY = {"high": 20, "medium": 10}
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float,
+                  _radians=radians, _cos=cos, _sin=sin, _asin=asin, _sqrt=sqrt) -> float:
+    """Great-circle distance between two points in kilometers"""
+    # The math functions are bound as defaults so they resolve as locals on this per-update path
+    # Convert decimal degrees to radians
+    lon1, lat1, lon2, lat2 = _radians(lon1), _radians(lat1), _radians(lon2), _radians(lat2)
+    
+    # Haversine formula
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = _sin(dlat/2)**2 + _cos(lat1) * _cos(lat2) * _sin(dlon/2)**2
+    c = 2 * _asin(_sqrt(a))
+    r = 6371  # Radius of earth in kilometers
+    
+    return c * r
+
 
 class IncidentReportingHandler:
     """Handler for the Anonymous Incident Reporting Agent"""
@@ -29,22 +104,22 @@ class IncidentReportingHandler:
             Dict containing report details and ID
         """
         # Generate a unique report ID
-        report_id = str(uuid.uuid4())
+        report_id = _uuid7()
         
         # Use the agent to analyze and anonymize the report
         agent_input = {
             "text": report_text,
             "location": location,
-            "timestamp": timestamp or datetime.now().isoformat(),
+            "timestamp": timestamp or _now().isoformat(),
             "task": "analyze_and_anonymize_report"
         }
         
         # Call the agent
-        agent_response = self.agent.run(json.dumps(agent_input))
+        agent_response = _run_agent(self.agent, agent_input)
         
         try:
             # Parse the agent response
-            analysis = json.loads(agent_response)
+            analysis = _parse_agent_response(agent_response)
             
             # Extract data from analysis
             anonymized_text = analysis.get("anonymized_text", report_text)
@@ -99,15 +174,12 @@ class IncidentReportingHandler:
         Returns:
             Dict with verification status
         """
-        # Verify the report in the database
-        success = self.db.verify_report(report_id, verification_type)
+        # Verify the report in the database (returns the updated report)
+        report = self.db.verify_report(report_id, verification_type)
         
-        if not success:
+        if not report:
             return {"status": "error", "message": "Report not found"}
         
-        # Get updated report
-        report = self.db.get_report(report_id)
-        
         if verification_type == "confirm":
             return {
                 "status": "success", 
@@ -135,18 +207,14 @@ class IncidentReportingHandler:
         # In a real implementation, this would query a volunteers database
         # For this demo, we'll return sample volunteers based on report categories
         volunteers = []
-        
-        # Sample volunteers
-        all_volunteers = [
-            {"id": "vol1", "name": "Support Volunteer 1", "expertise": ["harassment", "stalking"]},
-            {"id": "vol2", "name": "Support Volunteer 2", "expertise": ["physical_threat", "unsafe_environment"]},
-            {"id": "vol3", "name": "Support Volunteer 3", "expertise": ["general_concern"]}
-        ]
+        seen = set()
         
         # Match volunteers based on report categories
-        for volunteer in all_volunteers:
-            if any(category in volunteer["expertise"] for category in report["categories"]):
-                volunteers.append(volunteer)
+        for category in report["categories"]:
+            for volunteer in _VOLUNTEERS_BY_CATEGORY.get(category, ()):
+                if volunteer["id"] not in seen:
+                    seen.add(volunteer["id"])
+                    volunteers.append(volunteer)
         
         return {
             "status": "success",
@@ -169,17 +237,18 @@ class IncidentReportingHandler:
         reports = self.db.get_reports_by_area(latitude, longitude, radius_km)
         
         # Create sanitized versions with minimal details
-        sanitized_reports = []
-        for report in reports:
-            sanitized_reports.append({
+        return [
+            {
                 "id": report["id"],
                 "timestamp": report["created_at"],
                 "categories": report["categories"],
                 "severity": report["severity"],
+                "latitude": report["latitude"],
+                "longitude": report["longitude"],
                 "distance_km": report.get("distance_km", 0)
-            })
-        
-        return sanitized_reports
+            }
+            for report in reports
+        ]
 
 
 class SafetyNavigatorHandler:
@@ -188,6 +257,7 @@ class SafetyNavigatorHandler:
     def __init__(self, agent, db=None):
         self.agent = agent
         self.db = db or Database()
+        self.sms_service = sms_service
     
     def register_user(self, user_id: str, profile_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -203,15 +273,16 @@ class SafetyNavigatorHandler:
         # Create or update user in database
         self.db.create_user(user_id, profile_data.get("name"), profile_data.get("email"))
         
-        # Add emergency contacts if provided
+        # Add emergency contacts if provided (in a single insert)
         if "emergency_contacts" in profile_data:
-            for contact in profile_data["emergency_contacts"]:
-                self.db.add_emergency_contact(
-                    user_id=user_id,
-                    name=contact.get("name", ""),
-                    phone=contact.get("phone", ""),
-                    relationship=contact.get("relationship", "")
-                )
+            self.db.add_emergency_contacts_bulk(user_id, [
+                {
+                    "name": contact.get("name", ""),
+                    "phone": contact.get("phone", ""),
+                    "relationship": contact.get("relationship", "")
+                }
+                for contact in profile_data["emergency_contacts"]
+            ])
         
         return {
             "status": "success",
@@ -234,7 +305,7 @@ class SafetyNavigatorHandler:
             Dict containing journey details and safety information
         """
         # Generate a unique journey ID
-        journey_id = str(uuid.uuid4())
+        journey_id = _uuid7()
         
         # Use the agent to analyze route safety and generate recommendations
         agent_input = {
@@ -242,16 +313,16 @@ class SafetyNavigatorHandler:
             "start_location": start_location,
             "destination": destination,
             "travel_mode": travel_mode,
-            "current_time": datetime.now().isoformat(),
+            "current_time": _now().isoformat(),
             "task": "analyze_route_safety_and_recommendations"
         }
         
         # Call the agent
-        agent_response = self.agent.run(json.dumps(agent_input))
+        agent_response = _run_agent(self.agent, agent_input)
         
         try:
             # Parse the agent response
-            analysis = json.loads(agent_response)
+            analysis = _parse_agent_response(agent_response)
             
             # Extract data from analysis
             route_safety = analysis.get("route_safety", {
@@ -329,23 +400,24 @@ class SafetyNavigatorHandler:
             "journey_id": journey_id,
             "journey_data": journey,
             "current_location": current_location,
-            "timestamp": timestamp or datetime.now().isoformat(),
+            "timestamp": timestamp or _now().isoformat(),
             "task": "analyze_current_location_safety"
         }
         
         # Call the agent
-        agent_response = self.agent.run(json.dumps(agent_input))
+        agent_response = _run_agent(self.agent, agent_input)
         
         try:
             # Parse the agent response
-            analysis = json.loads(agent_response)
+            analysis = _parse_agent_response(agent_response)
             
             # Extract data from analysis
-            nearby_risks = analysis.get("nearby_risks", [])
-            alerts = analysis.get("alerts", [])
+            g = analysis.get
+            nearby_risks = g("nearby_risks", [])
+            alerts = g("alerts", [])
             
             # Check if destination reached
-            destination_reached = analysis.get("destination_reached", False)
+            destination_reached = g("destination_reached", False)
             
             # If not explicitly determined by the agent, calculate it
             if not destination_reached:
@@ -396,11 +468,8 @@ class SafetyNavigatorHandler:
         if not journey:
             return {"status": "error", "message": "Journey not found"}
         
-        # Update journey status in database
-        self.db.update_journey_status(journey_id, "completed")
-        
-        # Get updated journey
-        updated_journey = self.db.get_journey(journey_id)
+        # Update journey status in database and get the updated journey
+        updated_journey = self.db.update_journey_status_returning(journey_id, "completed")
         
         # Generate journey summary
         summary = {
@@ -418,6 +487,19 @@ class SafetyNavigatorHandler:
         }
     
     def trigger_emergency(self, journey_id: str, emergency_details: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Trigger emergency mode for a journey (blocking wrapper around trigger_emergency_async)
+        
+        Args:
+            journey_id: Journey identifier
+            emergency_details: Details about the emergency
+            
+        Returns:
+            Dict containing emergency response information
+        """
+        return run_coroutine(self.trigger_emergency_async(journey_id, emergency_details))
+    
+    async def trigger_emergency_async(self, journey_id: str, emergency_details: Dict[str, Any]) -> Dict[str, Any]:
         """
         Trigger emergency mode for a journey
         
@@ -429,20 +511,17 @@ class SafetyNavigatorHandler:
             Dict containing emergency response information
         """
         # Get the journey from database
-        journey = self.db.get_journey(journey_id)
+        journey = await asyncio.to_thread(self.db.get_journey, journey_id)
         
         if not journey:
             return {"status": "error", "message": "Journey not found"}
         
-        # Update journey status to emergency
-        self.db.update_journey_status(journey_id, "emergency")
-        
-        # Get user's emergency contacts
+        # Update journey status to emergency while fetching the user's emergency contacts
         user_id = journey["user_id"]
-        emergency_contacts = self.db.get_emergency_contacts(user_id)
-        
-        # Initialize SMS service
-        sms_service = SMSService()
+        _, emergency_contacts = await asyncio.gather(
+            asyncio.to_thread(self.db.update_journey_status, journey_id, "emergency"),
+            asyncio.to_thread(self.db.get_emergency_contacts, user_id)
+        )
         
         # Get the current location (use journey start location as fallback)
         current_location = {
@@ -451,15 +530,16 @@ class SafetyNavigatorHandler:
         }
         
         # Send SOS notifications to emergency contacts
-        notification_results = sms_service.send_sos_notifications(
+        notification_results = await self.sms_service.send_sos_notifications_async(
             user_name="User",  # In a real app, get the user's name
             location=current_location,
             message=emergency_details.get("description", "Emergency assistance needed!"),
             emergency_contacts=emergency_contacts
         )
         
-        # Record the SOS event in the database
-        self.db.create_sos(
+        # Record the SOS event in the database; its row ID identifies the emergency
+        sos_id = await asyncio.to_thread(
+            self.db.create_sos,
             user_id=user_id,
             latitude=current_location["latitude"],
             longitude=current_location["longitude"],
@@ -470,7 +550,7 @@ class SafetyNavigatorHandler:
         return {
             "status": "success",
             "message": "Emergency mode activated",
-            "emergency_id": str(uuid.uuid4()),  # Generate a unique emergency ID
+            "emergency_id": str(sos_id),
             "notified_contacts": len([r for r in notification_results if r["status"] in ["sent", "simulated"]]),
             "authorities_alerted": True,
             "notification_results": notification_results
@@ -479,38 +559,14 @@ class SafetyNavigatorHandler:
     def _check_destination_reached(self, destination: Dict[str, float], 
                                   current_location: Dict[str, float], threshold_km: float = 0.1) -> bool:
         """Check if the user has reached their destination"""
-        from math import radians, cos, sin, asin, sqrt
-        
-        # Convert decimal degrees to radians
-        lon1, lat1, lon2, lat2 = map(radians, [
-            current_location["longitude"], current_location["latitude"],
-            destination["longitude"], destination["latitude"]
-        ])
-        
-        # Haversine formula
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
-        r = 6371  # Radius of earth in kilometers
-        
-        distance = c * r
-        return distance <= threshold_km
+        lat1 = current_location["latitude"]
+        lon1 = current_location["longitude"]
+        return _haversine_km(lat1, lon1, destination["latitude"], destination["longitude"]) <= threshold_km
     
     def _calculate_safety_score(self, journey: Dict[str, Any]) -> int:
         """Calculate a safety score for the completed journey"""
-        # Base score
-        score = 100
-        
-        # Deduct points based on route risk
-        route_safety = journey["route_safety"]
-        if route_safety["overall_risk"] == "high":
-            score -= 20
-        elif route_safety["overall_risk"] == "medium":
-            score -= 10
-        
-        # Ensure score doesn't go below 0
-        return max(0, score)
+        # Base score of 100, minus points based on route risk (never below 0)
+        return max(0, 100 - _RISK_PENALTY.get(journey["route_safety"]["overall_risk"], 0))
 
 
 class EmergencyAlertHandler:
@@ -519,7 +575,7 @@ class EmergencyAlertHandler:
     def __init__(self, agent, db=None):
         self.agent = agent
         self.db = db or Database()
-        self.sms_service = SMSService()
+        self.sms_service = sms_service
     
     def subscribe_user(self, user_id: str, location: Dict[str, float], 
                       preferences: Dict[str, Any]) -> Dict[str, Any]:
@@ -544,6 +600,19 @@ class EmergencyAlertHandler:
         }
     
     def create_alert(self, user_id: str, alert_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create a new emergency alert (blocking wrapper around create_alert_async)
+        
+        Args:
+            user_id: ID of the user reporting the alert
+            alert_data: Alert details
+            
+        Returns:
+            Dict containing alert creation status
+        """
+        return run_coroutine(self.create_alert_async(user_id, alert_data))
+    
+    async def create_alert_async(self, user_id: str, alert_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a new emergency alert
         
@@ -555,59 +624,56 @@ class EmergencyAlertHandler:
             Dict containing alert creation status
         """
         # Generate a unique alert ID
-        alert_id = str(uuid.uuid4())
+        alert_id = _uuid7()
         
         # Use the agent to process the alert
         agent_input = {
             "reporter_id": user_id,
             "alert_data": alert_data,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _now().isoformat(),
             "task": "process_emergency_alert"
         }
         
         # Call the agent
-        agent_response = self.agent.run(json.dumps(agent_input))
+        agent_response = await asyncio.to_thread(_run_agent, self.agent, agent_input)
         
         try:
             # Parse the agent response
-            analysis = json.loads(agent_response)
+            analysis = _parse_agent_response(agent_response)
             
             # Extract data from analysis
-            severity = analysis.get("severity", alert_data.get("severity", "medium"))
+            g = alert_data.get
+            location = g("location", {})
+            severity = analysis.get("severity", g("severity", "medium"))
             
-            # Store the alert in the database
-            self.db.create_alert(
-                alert_id=alert_id,
-                reporter_id=user_id,
-                alert_type=alert_data.get("type", "general"),
-                description=alert_data.get("description", ""),
-                latitude=alert_data.get("location", {}).get("latitude", 0),
-                longitude=alert_data.get("location", {}).get("longitude", 0),
-                severity=severity
-            )
+            alert_row = {
+                "alert_id": alert_id,
+                "reporter_id": user_id,
+                "alert_type": g("type", "general"),
+                "description": g("description", ""),
+                "latitude": location.get("latitude", 0),
+                "longitude": location.get("longitude", 0),
+                "severity": severity
+            }
             
             # Get nearby users to notify (in a real app)
             # For this demo, we'll simulate notifying users
             notified_users = 5  # Simulated number
             
-            # If high severity, send SMS to emergency contacts of the reporter
+            # If high severity, store the alert right away and send SMS to
+            # emergency contacts of the reporter at the same time
             notified_authorities = []
             if severity == "high":
-                # Get emergency contacts
-                emergency_contacts = self.db.get_emergency_contacts(user_id)
+                _, notification_results = await asyncio.gather(
+                    asyncio.to_thread(self.db.create_alert, **alert_row),
+                    self._notify_emergency_contacts(user_id, alert_data)
+                )
                 
-                if emergency_contacts:
-                    # Send notifications
-                    location = alert_data.get("location", {"latitude": 0, "longitude": 0})
-                    notification_results = self.sms_service.send_sos_notifications(
-                        user_name="User",  # In a real app, get the user's name
-                        location=location,
-                        message=f"ALERT: {alert_data.get('description', 'Emergency alert!')}",
-                        emergency_contacts=emergency_contacts
-                    )
-                    
-                    # Count successful notifications
-                    notified_authorities = [r for r in notification_results if r["status"] in ["sent", "simulated"]]
+                # Count successful notifications
+                notified_authorities = [r for r in notification_results if r["status"] in ["sent", "simulated"]]
+            else:
+                # Other alerts are queued and written with the next batch
+                self.db.create_alert(**alert_row, buffered=True)
             
             return {
                 "status": "success",
@@ -622,14 +688,17 @@ class EmergencyAlertHandler:
             print(f"Error processing agent response: {str(e)}")
             
             # Still create the alert in the database with default values
-            self.db.create_alert(
+            severity = alert_data.get("severity", "medium")
+            await asyncio.to_thread(
+                self.db.create_alert,
                 alert_id=alert_id,
                 reporter_id=user_id,
                 alert_type=alert_data.get("type", "general"),
                 description=alert_data.get("description", ""),
                 latitude=alert_data.get("location", {}).get("latitude", 0),
                 longitude=alert_data.get("location", {}).get("longitude", 0),
-                severity=alert_data.get("severity", "medium")
+                severity=severity,
+                buffered=severity != "high"
             )
             
             # Fallback response
@@ -642,6 +711,21 @@ class EmergencyAlertHandler:
                 "message": "Emergency alert created but there was an issue with processing"
             }
     
+    async def _notify_emergency_contacts(self, user_id: str, alert_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Send an alert SMS to the reporter's emergency contacts"""
+        emergency_contacts = await asyncio.to_thread(self.db.get_emergency_contacts, user_id)
+        
+        if not emergency_contacts:
+            return []
+        
+        location = alert_data.get("location", {"latitude": 0, "longitude": 0})
+        return await self.sms_service.send_sos_notifications_async(
+            user_name="User",  # In a real app, get the user's name
+            location=location,
+            message=f"ALERT: {alert_data.get('description', 'Emergency alert!')}",
+            emergency_contacts=emergency_contacts
+        )
+    
     def verify_alert(self, alert_id: str, user_id: str, 
                     verification_type: str = "confirm") -> Dict[str, Any]:
         """
@@ -655,15 +739,12 @@ class EmergencyAlertHandler:
         Returns:
             Dict with verification status
         """
-        # Verify the alert in the database
-        success = self.db.verify_alert(alert_id, verification_type)
+        # Verify the alert in the database (returns the updated alert)
+        alert = self.db.verify_alert(alert_id, verification_type)
         
-        if not success:
+        if not alert:
             return {"status": "error", "message": "Alert not found"}
         
-        # Get updated alert
-        alert = self.db.get_alert(alert_id)
-        
         if verification_type == "confirm":
             return {
                 "status": "success", 
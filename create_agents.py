@@ -1,11 +1,42 @@
-from aixplain.factories import ModelFactory
-from aixplain.factories import AgentFactory, TeamAgentFactory
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# aixplain settings, read once at import
+_API_KEY = os.getenv("AIXPLAIN_API_KEY")
+_LLM_MODEL_ID = os.getenv("AIXPLAIN_LLM_MODEL_ID")
+
+# Agent descriptions, sent to aixplain exactly as written
+_INCIDENT_REPORTING_DESCRIPTION = """
+        A platform where individuals can anonymously report safety concerns, crimes, or distress situations.
+        This agent can:
+        1. Anonymize reports by removing personally identifiable information
+        2. Categorize reports by severity and type
+        3. Assess if immediate action is required
+        4. Recommend appropriate community support
+        """
+_SAFETY_NAVIGATOR_DESCRIPTION = """
+        AI-driven personal safety assistant that guides users in avoiding high-risk areas.
+        This agent can:
+        1. Analyze routes for safety concerns
+        2. Provide real-time risk assessment
+        3. Generate safety recommendations
+        4. Monitor user location and alert about potential dangers
+        5. Suggest safer alternative routes
+        """
+_EMERGENCY_ALERT_DESCRIPTION = """
+        A real-time system that sends emergency alerts to individuals, communities, and authorities.
+        This agent can:
+        1. Process emergency alerts and determine severity
+        2. Identify which authorities should be notified
+        3. Generate appropriate alert messages
+        4. Prioritize alerts based on urgency
+        5. Verify alerts to prevent false alarms
+        """
+
 def create_women_safety_agents():
     """
     Create the three AI agents for women's safety and combine them into a team agent
@@ -14,9 +45,9 @@ def create_women_safety_agents():
     Returns:
         Dict containing all created agents
     """
-    # Get API key and model ID from environment variables
-    api_key = os.getenv("AIXPLAIN_API_KEY")
-    llm_model_id = os.getenv("AIXPLAIN_LLM_MODEL_ID")
+    # API key and model ID come from the environment
+    api_key = _API_KEY
+    llm_model_id = _LLM_MODEL_ID
     
     if not api_key:
         raise ValueError("AIXPLAIN_API_KEY environment variable is not set")
@@ -26,57 +57,48 @@ def create_women_safety_agents():
     # Set API key for aixplain
     os.environ["AIXPLAIN_API_KEY"] = api_key
     
+    # aixplain is slow to import, so only load it when agents are actually built
+    from aixplain.factories import ModelFactory
+    from aixplain.factories import AgentFactory, TeamAgentFactory
+    
     print("Creating AI agents for women's safety...")
     
     # Create the main LLM tool that will be used by all agents
     # main_llm_tool = ModelFactory.get(llm_model_id)
     
-    # 1. Create the Anonymous Incident Reporting Agent
-    incident_reporting_agent = AgentFactory.create(
-        name="Anonymous Incident Reporting Agent",
-        description="""
-        A platform where individuals can anonymously report safety concerns, crimes, or distress situations.
-        This agent can:
-        1. Anonymize reports by removing personally identifiable information
-        2. Categorize reports by severity and type
-        3. Assess if immediate action is required
-        4. Recommend appropriate community support
-        """,
-        # tools=[main_llm_tool],
-        llm_id=llm_model_id
-    )
+    # The three agents don't depend on each other, so create them concurrently
+    with ThreadPoolExecutor(max_workers=3) as executor:
     
-    # 2. Create the Personalized Safety Navigator Agent
-    safety_navigator_agent = AgentFactory.create(
-        name="Personalized Safety Navigator",
-        description="""
-        AI-driven personal safety assistant that guides users in avoiding high-risk areas.
-        This agent can:
-        1. Analyze routes for safety concerns
-        2. Provide real-time risk assessment
-        3. Generate safety recommendations
-        4. Monitor user location and alert about potential dangers
-        5. Suggest safer alternative routes
-        """,
-        # tools=[main_llm_tool],
-        llm_id=llm_model_id
-    )
+        # 1. Create the Anonymous Incident Reporting Agent
+        incident_reporting_future = executor.submit(
+            AgentFactory.create,
+            name="Anonymous Incident Reporting Agent",
+            description=_INCIDENT_REPORTING_DESCRIPTION,
+            # tools=[main_llm_tool],
+            llm_id=llm_model_id
+        )
     
-    # 3. Create the Emergency Alert System Agent
-    emergency_alert_agent = AgentFactory.create(
-        name="Emergency Alert System",
-        description="""
-        A real-time system that sends emergency alerts to individuals, communities, and authorities.
-        This agent can:
-        1. Process emergency alerts and determine severity
-        2. Identify which authorities should be notified
-        3. Generate appropriate alert messages
-        4. Prioritize alerts based on urgency
-        5. Verify alerts to prevent false alarms
-        """,
-        # tools=[main_llm_tool],
-        llm_id=llm_model_id
-    )
+        # 2. Create the Personalized Safety Navigator Agent
+        safety_navigator_future = executor.submit(
+            AgentFactory.create,
+            name="Personalized Safety Navigator",
+            description=_SAFETY_NAVIGATOR_DESCRIPTION,
+            # tools=[main_llm_tool],
+            llm_id=llm_model_id
+        )
+    
+        # 3. Create the Emergency Alert System Agent
+        emergency_alert_future = executor.submit(
+            AgentFactory.create,
+            name="Emergency Alert System",
+            description=_EMERGENCY_ALERT_DESCRIPTION,
+            # tools=[main_llm_tool],
+            llm_id=llm_model_id
+        )
+    
+        incident_reporting_agent = incident_reporting_future.result()
+        safety_navigator_agent = safety_navigator_future.result()
+        emergency_alert_agent = emergency_alert_future.result()
     
     # Create a Team Agent that combines all three agents
     women_safety_team = TeamAgentFactory.create(
@@ -1,40 +1,195 @@
 import sqlite3
 import os
-import json
+import orjson
+import time
+import atexit
+import queue
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
-from math import radians, cos
+from math import radians, cos, sin, asin, sqrt
 import threading
 
+# Seconds between background flushes of queued alert inserts
+ALERT_FLUSH_INTERVAL = 0.1
+
+# Seconds a user's emergency contacts are served from memory before SQLite is asked again
+CONTACTS_CACHE_TTL = 60.0
+CONTACTS_CACHE_MAX = 10000
+
+# Upper bound on pooled read-only connections
+READ_POOL_SIZE = min(8, (os.cpu_count() or 1) * 2)
+
+# Per-connection settings applied to every new connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Haversine distance in km between two points."""
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2)**2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2)**2
+    return 2 * 6371 * asin(sqrt(a))
+
+def _haversine_km(lat1_rad, lon1_rad, cos_lat1, lat2, lon2):
+    """Haversine distance in km from a point already in radians (with its cosine) to a point in degrees."""
+    lat2 = radians(lat2)
+    a = sin((lat2 - lat1_rad) / 2)**2 + cos_lat1 * cos(lat2) * sin((radians(lon2) - lon1_rad) / 2)**2
+    return 2 * 6371 * asin(sqrt(a))
+
+# SQL statements, kept as constants so each call reuses the same prepared statement
+_UPSERT_USER_SQL = """INSERT INTO users (id, name, email, created_at, updated_at) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET updated_at = excluded.updated_at
+    RETURNING *"""
+_SELECT_USER_SQL = "SELECT * FROM users WHERE id = ?"
+_INSERT_CONTACT_SQL = "INSERT INTO emergency_contacts (user_id, name, phone, relationship, created_at) VALUES (?, ?, ?, ?, ?)"
+_SELECT_CONTACTS_SQL = "SELECT * FROM emergency_contacts WHERE user_id = ?"
+_DELETE_CONTACT_SQL = "DELETE FROM emergency_contacts WHERE id = ? AND user_id = ?"
+_INSERT_REPORT_SQL = """INSERT INTO reports
+    (id, reporter_id, description, anonymized_description, latitude, longitude,
+     severity, categories, status, verification_count, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+_SELECT_REPORT_SQL = "SELECT * FROM reports WHERE id = ?"
+_SELECT_REPORTS_IN_AREA_SQL = """SELECT id, latitude, longitude, severity, categories, status,
+           verification_count, created_at,
+           haversine_km_rad(?, ?, ?, latitude, longitude) AS distance_km
+    FROM reports
+    WHERE latitude BETWEEN ? AND ?
+    AND longitude BETWEEN ? AND ?
+    AND distance_km <= ?"""
+_INSERT_JOURNEY_SQL = """INSERT INTO journeys
+    (id, user_id, start_latitude, start_longitude, destination_latitude,
+     destination_longitude, travel_mode, status, route_safety, start_time)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+_END_JOURNEY_SQL = "UPDATE journeys SET status = ?, end_time = ? WHERE id = ?"
+_UPDATE_JOURNEY_STATUS_SQL = "UPDATE journeys SET status = ? WHERE id = ?"
+_END_JOURNEY_RETURNING_SQL = _END_JOURNEY_SQL + " RETURNING *"
+_UPDATE_JOURNEY_STATUS_RETURNING_SQL = _UPDATE_JOURNEY_STATUS_SQL + " RETURNING *"
+_SELECT_JOURNEY_SQL = "SELECT * FROM journeys WHERE id = ?"
+_INSERT_ALERT_SQL = """INSERT INTO alerts
+    (id, reporter_id, alert_type, description, latitude, longitude,
+     severity, status, verification_count, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+_SELECT_ALERT_SQL = "SELECT * FROM alerts WHERE id = ?"
+_SELECT_ACTIVE_ALERTS_IN_AREA_SQL = """SELECT *, haversine_km_rad(?, ?, ?, latitude, longitude) AS distance_km
+    FROM alerts
+    WHERE status = 'active'
+    AND latitude BETWEEN ? AND ?
+    AND longitude BETWEEN ? AND ?
+    AND distance_km <= ?
+    ORDER BY CASE severity WHEN 'high' THEN 0 WHEN 'medium' THEN 1 ELSE 2 END, distance_km"""
+_RESOLVE_ALERT_WITH_DETAILS_SQL = "UPDATE alerts SET status = ?, updated_at = ?, resolution_details = ? WHERE id = ?"
+_RESOLVE_ALERT_SQL = "UPDATE alerts SET status = ?, updated_at = ? WHERE id = ?"
+_INSERT_SOS_SQL = """INSERT INTO sos_history
+    (user_id, latitude, longitude, message, contacts_notified, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)"""
+_SELECT_SOS_HISTORY_SQL = "SELECT * FROM sos_history WHERE user_id = ? ORDER BY created_at DESC"
+
+# Verification updates; each bumps the count and promotes the row in one statement
+_CONFIRM_REPORT_SQL = """UPDATE reports
+    SET verification_count = verification_count + 1,
+        status = CASE WHEN verification_count + 1 >= 3 THEN 'verified' ELSE status END,
+        updated_at = ?
+    WHERE id = ? RETURNING *"""
+_DISPUTE_REPORT_SQL = "UPDATE reports SET status = 'disputed', updated_at = ? WHERE id = ? RETURNING *"
+_CONFIRM_ALERT_SQL = """UPDATE alerts
+    SET verification_count = verification_count + 1,
+        severity = CASE WHEN verification_count + 1 >= 3 THEN 'high' ELSE severity END,
+        updated_at = ?
+    WHERE id = ? RETURNING *"""
+_DISPUTE_ALERT_SQL = "UPDATE alerts SET status = 'disputed', updated_at = ? WHERE id = ? RETURNING *"
+
 class Database:
     def __init__(self, db_path="women_safety.db"):
-        """Initialize the database by creating tables using a temporary connection."""
+        """Initialize the database by creating tables on the writer connection."""
         self.db_path = db_path
-        # Thread-local storage for per-thread connections
-        self.thread_local = threading.local()
-        # Use a one-off connection to create tables, ensuring it is used in a single thread.
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-            cursor = conn.cursor()
-            self.create_tables(cursor)
-            conn.commit()
+        # Read-only connections are pooled and opened on demand; in-memory
+        # databases can't be shared, so there everything uses the writer
+        self._read_pool = queue.LifoQueue()
+        self._read_pool_lock = threading.Lock()
+        self._read_conns = 0
+        self._shared_reads = self.db_path.startswith(':memory:')
+        # Queued alert rows, written in batches by a background thread
+        self._alert_buffer = deque()
+        self._alert_lock = threading.Lock()
+        self._alert_flusher = None
+        # Emergency contacts by user ID, as (time.monotonic() when loaded, rows)
+        self._contacts_cache = {}
+        # Bumped per user on every contact change, so a read that raced one isn't cached
+        self._contacts_gen = {}
+        self._contacts_lock = threading.Lock()
+        # Single writer connection, used by one thread at a time
+        self._write_conn = self.connect()
+        self._write_cursor = self._write_conn.cursor()
+        self._write_lock = threading.Lock()
+        if not self._shared_reads:
+            # WAL lets readers run alongside the writer; it is stored in the file
+            self._write_cursor.execute("PRAGMA journal_mode=WAL")
+        self.create_tables(self._write_cursor)
+        self._write_conn.commit()
 
-    def connect(self):
-        """Connect to the SQLite database in a thread-safe manner.
-        Each thread gets its own connection.
-        """
-        if not hasattr(self.thread_local, 'conn') or self.thread_local.conn is None:
-            # Each thread creates its own connection
-            self.thread_local.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.thread_local.conn.row_factory = sqlite3.Row
-            self.thread_local.cursor = self.thread_local.conn.cursor()
-        return self.thread_local.conn, self.thread_local.cursor
+    def connect(self, read_only=False):
+        """Open a new connection with the app's row factory, functions and pragmas."""
+        if read_only:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False,
+                                   cached_statements=256)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        # Lets area queries filter by exact distance inside SQLite
+        conn.create_function("haversine_km_rad", 5, _haversine_km, deterministic=True)
+        if not self.db_path.startswith(':memory:'):
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def _read(self):
+        """Borrow a read-only connection from the pool for the duration of a query."""
+        if self._shared_reads:
+            with self._write() as (conn, cursor):
+                yield conn, cursor
+            return
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            with self._read_pool_lock:
+                opened = self._read_conns < READ_POOL_SIZE
+                if opened:
+                    self._read_conns += 1
+            conn = self.connect(read_only=True) if opened else self._read_pool.get()
+        cursor = conn.cursor()
+        try:
+            yield conn, cursor
+        finally:
+            # Closing the cursor ends its read transaction before the connection is reused
+            cursor.close()
+            self._read_pool.put(conn)
+
+    @contextmanager
+    def _write(self):
+        """Hold the write lock and yield the writer connection."""
+        with self._write_lock:
+            try:
+                yield self._write_conn, self._write_cursor
+            except BaseException:
+                # Don't leave a half-done transaction for the next writer to commit
+                self._write_conn.rollback()
+                raise
 
     def close(self):
-        """Close the database connection for the current thread."""
-        if hasattr(self.thread_local, 'conn') and self.thread_local.conn:
-            self.thread_local.conn.close()
-            self.thread_local.conn = None
-            self.thread_local.cursor = None
+        """Close the writer and every pooled read connection."""
+        with self._write_lock:
+            self._write_conn.close()
+        while True:
+            try:
+                self._read_pool.get_nowait().close()
+            except queue.Empty:
+                break
 
     def create_tables(self, cursor):
         """Create necessary tables if they don't exist."""
@@ -131,308 +286,396 @@ class Database:
         )
         ''')
 
+        # Indexes for the area lookups and per-user queries
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_reports_geo ON reports (latitude, longitude)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_alerts_active_geo ON alerts (status, latitude, longitude)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_ec_user ON emergency_contacts (user_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sos_user_time ON sos_history (user_id, created_at DESC)")
+
+        # Planner statistics so the indexes get picked: a full ANALYZE only until some
+        # exist, then PRAGMA optimize, which re-analyzes just the tables that grew a lot
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cursor.fetchone() and cursor.execute("SELECT 1 FROM sqlite_stat1 LIMIT 1").fetchone():
+            cursor.execute("PRAGMA optimize=0x10002")
+        else:
+            cursor.execute("ANALYZE")
+
     # User methods
     def create_user(self, user_id, name=None, email=None):
-        """Create a new user."""
-        conn, cursor = self.connect()
+        """Create a user, or touch updated_at if it exists, and return its row as a sqlite3.Row."""
         now = datetime.now().isoformat()
-        cursor.execute(
-            "INSERT OR IGNORE INTO users (id, name, email, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
-            (user_id, name, email, now, now)
-        )
-        conn.commit()
-        return user_id
+        with self._write() as (conn, cursor):
+            cursor.execute(
+                _UPSERT_USER_SQL,
+                (user_id, name, email, now, now)
+            )
+            user = cursor.fetchone()
+            conn.commit()
+            return user
 
     def get_user(self, user_id):
-        """Get user by ID."""
-        conn, cursor = self.connect()
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        result = dict(cursor.fetchone() or {})
-        return result
+        """Get user by ID as a sqlite3.Row (key and index access), or None."""
+        with self._read() as (conn, cursor):
+            cursor.execute(_SELECT_USER_SQL, (user_id,))
+            return cursor.fetchone()
 
     # Emergency contact methods
     def add_emergency_contact(self, user_id, name, phone, relationship=None):
         """Add an emergency contact for a user."""
-        conn, cursor = self.connect()
         now = datetime.now().isoformat()
-        cursor.execute(
-            "INSERT INTO emergency_contacts (user_id, name, phone, relationship, created_at) VALUES (?, ?, ?, ?, ?)",
-            (user_id, name, phone, relationship, now)
-        )
-        conn.commit()
-        return cursor.lastrowid
+        with self._write() as (conn, cursor):
+            cursor.execute(
+                _INSERT_CONTACT_SQL,
+                (user_id, name, phone, relationship, now)
+            )
+            conn.commit()
+            self._invalidate_contacts(user_id)
+            return cursor.lastrowid
+
+    def add_emergency_contacts_bulk(self, user_id, contacts):
+        """Add several emergency contacts (dicts with name, phone and optional relationship) in one transaction."""
+        now = datetime.now().isoformat()
+        with self._write() as (conn, cursor):
+            cursor.executemany(
+                _INSERT_CONTACT_SQL,
+                [(user_id, c['name'], c['phone'], c.get('relationship'), now) for c in contacts]
+            )
+            conn.commit()
+            self._invalidate_contacts(user_id)
+            return len(contacts)
 
     def get_emergency_contacts(self, user_id):
-        """Get all emergency contacts for a user."""
-        conn, cursor = self.connect()
-        cursor.execute("SELECT * FROM emergency_contacts WHERE user_id = ?", (user_id,))
-        return [dict(row) for row in cursor.fetchall()]
+        """Get all emergency contacts for a user, from memory if loaded within CONTACTS_CACHE_TTL."""
+        now = time.monotonic()
+        with self._contacts_lock:
+            cached = self._contacts_cache.get(user_id)
+            gen = self._contacts_gen.get(user_id, 0)
+        if cached and now - cached[0] < CONTACTS_CACHE_TTL:
+            return [dict(contact) for contact in cached[1]]
+        with self._read() as (conn, cursor):
+            cursor.execute(_SELECT_CONTACTS_SQL, (user_id,))
+            contacts = [dict(row) for row in cursor.fetchall()]
+        with self._contacts_lock:
+            if self._contacts_gen.get(user_id, 0) == gen:
+                if len(self._contacts_cache) >= CONTACTS_CACHE_MAX:
+                    self._contacts_cache.clear()
+                self._contacts_cache[user_id] = (now, [dict(contact) for contact in contacts])
+        return contacts
+
+    def _invalidate_contacts(self, user_id):
+        """Drop a user's cached emergency contacts after they change."""
+        with self._contacts_lock:
+            self._contacts_cache.pop(user_id, None)
+            self._contacts_gen[user_id] = self._contacts_gen.get(user_id, 0) + 1
 
     def delete_emergency_contact(self, contact_id, user_id):
         """Delete an emergency contact."""
-        conn, cursor = self.connect()
-        cursor.execute(
-            "DELETE FROM emergency_contacts WHERE id = ? AND user_id = ?",
-            (contact_id, user_id)
-        )
-        conn.commit()
-        return cursor.rowcount > 0
+        with self._write() as (conn, cursor):
+            cursor.execute(
+                _DELETE_CONTACT_SQL,
+                (contact_id, user_id)
+            )
+            conn.commit()
+            self._invalidate_contacts(user_id)
+            return cursor.rowcount > 0
 
     # Report methods
     def create_report(self, report_id, reporter_id, description, anonymized_description, 
                       latitude, longitude, severity, categories, status="submitted"):
         """Create a new incident report."""
-        conn, cursor = self.connect()
         now = datetime.now().isoformat()
-        categories_json = json.dumps(categories)
-        cursor.execute(
-            """INSERT INTO reports 
-               (id, reporter_id, description, anonymized_description, latitude, longitude, 
-                severity, categories, status, verification_count, created_at, updated_at) 
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (report_id, reporter_id, description, anonymized_description, latitude, longitude, 
-             severity, categories_json, status, 0, now, now)
-        )
-        conn.commit()
-        return report_id
+        with self._write() as (conn, cursor):
+            categories_json = orjson.dumps(categories).decode()
+            cursor.execute(
+                _INSERT_REPORT_SQL,
+                (report_id, reporter_id, description, anonymized_description, latitude, longitude, 
+                 severity, categories_json, status, 0, now, now)
+            )
+            conn.commit()
+            return report_id
 
     def get_report(self, report_id):
         """Get report by ID."""
-        conn, cursor = self.connect()
-        cursor.execute("SELECT * FROM reports WHERE id = ?", (report_id,))
-        row = cursor.fetchone()
-        if row:
-            result = dict(row)
-            result['categories'] = json.loads(result['categories'])
-            return result
-        return None
+        with self._read() as (conn, cursor):
+            cursor.execute(_SELECT_REPORT_SQL, (report_id,))
+            row = cursor.fetchone()
+            if row:
+                result = dict(row)
+                result['categories'] = orjson.loads(result['categories'])
+                return result
+            return None
 
     def get_reports_by_area(self, latitude, longitude, radius_km=5.0):
-        """Get reports within a radius of a location."""
-        conn, cursor = self.connect()
-        lat_range = radius_km / 111.0
-        lng_range = radius_km / (111.0 * cos(radians(latitude)))
-        cursor.execute(
-            """SELECT * FROM reports 
-               WHERE latitude BETWEEN ? AND ?
-               AND longitude BETWEEN ? AND ?""",
-            (latitude - lat_range, latitude + lat_range, 
-             longitude - lng_range, longitude + lng_range)
-        )
-        reports = []
-        for row in cursor.fetchall():
-            report = dict(row)
-            report['categories'] = json.loads(report['categories'])
-            distance = self.calculate_distance(
-                latitude, longitude, report['latitude'], report['longitude']
+        """Get reports within a radius of a location (descriptions are not loaded)."""
+        with self._read() as (conn, cursor):
+            # Bounding box first so only nearby rows reach the distance check;
+            # cos() is clamped so the box stays finite near the poles
+            lat_rad = radians(latitude)
+            cos_lat = cos(lat_rad)
+            lat_range = radius_km / 111.0
+            lng_range = radius_km / (111.0 * max(0.01, cos_lat))
+            cursor.execute(
+                _SELECT_REPORTS_IN_AREA_SQL,
+                (lat_rad, radians(longitude), cos_lat,
+                 latitude - lat_range, latitude + lat_range, 
+                 longitude - lng_range, longitude + lng_range,
+                 radius_km)
             )
-            if distance <= radius_km:
-                report['distance_km'] = round(distance, 2)
+            # Rows outside the radius never leave SQLite
+            reports = []
+            for row in cursor.fetchall():
+                report = dict(row)
+                report['categories'] = orjson.loads(report['categories'])
+                report['distance_km'] = round(report['distance_km'], 2)
                 reports.append(report)
-        return reports
+            return reports
 
     def verify_report(self, report_id, verification_type="confirm"):
-        """Verify or dispute a report."""
-        conn, cursor = self.connect()
-        cursor.execute("SELECT * FROM reports WHERE id = ?", (report_id,))
-        report = dict(cursor.fetchone() or {})
-        if not report:
-            return False
-        if verification_type == "confirm":
-            new_count = report.get('verification_count', 0) + 1
-            cursor.execute(
-                "UPDATE reports SET verification_count = ?, updated_at = ? WHERE id = ?",
-                (new_count, datetime.now().isoformat(), report_id)
-            )
-            if new_count >= 3:
-                cursor.execute(
-                    "UPDATE reports SET status = ?, updated_at = ? WHERE id = ?",
-                    ("verified", datetime.now().isoformat(), report_id)
-                )
-        else:
-            cursor.execute(
-                "UPDATE reports SET status = ?, updated_at = ? WHERE id = ?",
-                ("disputed", datetime.now().isoformat(), report_id)
-            )
-        conn.commit()
-        return True
+        """Verify or dispute a report. Returns the updated report, or None if it doesn't exist."""
+        now = datetime.now().isoformat()
+        sql = _CONFIRM_REPORT_SQL if verification_type == "confirm" else _DISPUTE_REPORT_SQL
+        with self._write() as (conn, cursor):
+            cursor.execute(sql, (now, report_id))
+            row = cursor.fetchone()
+            conn.commit()
+            if row is None:
+                return None
+            updated = dict(row)
+            updated['categories'] = orjson.loads(updated['categories'])
+            return updated
 
     # Journey methods
     def create_journey(self, journey_id, user_id, start_latitude, start_longitude,
                        destination_latitude, destination_longitude, travel_mode, route_safety):
         """Create a new journey."""
-        conn, cursor = self.connect()
         now = datetime.now().isoformat()
-        route_safety_json = json.dumps(route_safety)
-        cursor.execute(
-            """INSERT INTO journeys 
-               (id, user_id, start_latitude, start_longitude, destination_latitude, 
-                destination_longitude, travel_mode, status, route_safety, start_time) 
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (journey_id, user_id, start_latitude, start_longitude, destination_latitude, 
-             destination_longitude, travel_mode, "active", route_safety_json, now)
-        )
-        conn.commit()
-        return journey_id
+        with self._write() as (conn, cursor):
+            route_safety_json = orjson.dumps(route_safety).decode()
+            cursor.execute(
+                _INSERT_JOURNEY_SQL,
+                (journey_id, user_id, start_latitude, start_longitude, destination_latitude, 
+                 destination_longitude, travel_mode, "active", route_safety_json, now)
+            )
+            conn.commit()
+            return journey_id
 
     def update_journey_status(self, journey_id, status, end_time=None):
         """Update journey status."""
-        conn, cursor = self.connect()
         if end_time is None and status == "completed":
             end_time = datetime.now().isoformat()
-        if end_time:
-            cursor.execute(
-                "UPDATE journeys SET status = ?, end_time = ? WHERE id = ?",
-                (status, end_time, journey_id)
-            )
-        else:
-            cursor.execute(
-                "UPDATE journeys SET status = ? WHERE id = ?",
-                (status, journey_id)
-            )
-        conn.commit()
-        return cursor.rowcount > 0
+        with self._write() as (conn, cursor):
+            if end_time:
+                cursor.execute(
+                    _END_JOURNEY_SQL,
+                    (status, end_time, journey_id)
+                )
+            else:
+                cursor.execute(
+                    _UPDATE_JOURNEY_STATUS_SQL,
+                    (status, journey_id)
+                )
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def update_journey_status_returning(self, journey_id, status, end_time=None):
+        """Update journey status and return the updated journey, or None if it doesn't exist."""
+        if end_time is None and status == "completed":
+            end_time = datetime.now().isoformat()
+        with self._write() as (conn, cursor):
+            if end_time:
+                cursor.execute(
+                    _END_JOURNEY_RETURNING_SQL,
+                    (status, end_time, journey_id)
+                )
+            else:
+                cursor.execute(
+                    _UPDATE_JOURNEY_STATUS_RETURNING_SQL,
+                    (status, journey_id)
+                )
+            row = cursor.fetchone()
+            conn.commit()
+            if row:
+                result = dict(row)
+                result['route_safety'] = orjson.loads(result['route_safety'])
+                return result
+            return None
 
     def get_journey(self, journey_id):
         """Get journey by ID."""
-        conn, cursor = self.connect()
-        cursor.execute("SELECT * FROM journeys WHERE id = ?", (journey_id,))
-        row = cursor.fetchone()
-        if row:
-            result = dict(row)
-            result['route_safety'] = json.loads(result['route_safety'])
-            return result
-        return None
+        with self._read() as (conn, cursor):
+            cursor.execute(_SELECT_JOURNEY_SQL, (journey_id,))
+            row = cursor.fetchone()
+            if row:
+                result = dict(row)
+                result['route_safety'] = orjson.loads(result['route_safety'])
+                return result
+            return None
 
     # Alert methods
     def create_alert(self, alert_id, reporter_id, alert_type, description, 
-                     latitude, longitude, severity, status="active"):
-        """Create a new emergency alert."""
-        conn, cursor = self.connect()
+                     latitude, longitude, severity, status="active", buffered=False):
+        """Create a new emergency alert.
+        With buffered=True the row is queued and written by the background flusher
+        within ALERT_FLUSH_INTERVAL seconds; alert reads flush the queue first.
+        """
         now = datetime.now().isoformat()
-        cursor.execute(
-            """INSERT INTO alerts 
-               (id, reporter_id, alert_type, description, latitude, longitude, 
-                severity, status, verification_count, created_at, updated_at) 
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (alert_id, reporter_id, alert_type, description, latitude, longitude, 
-             severity, status, 1, now, now)  # Start with verification count 1 (self-verified)
-        )
-        conn.commit()
-        return alert_id
+        row = (alert_id, reporter_id, alert_type, description, latitude, longitude, 
+               severity, status, 1, now, now)  # Start with verification count 1 (self-verified)
+        if buffered:
+            self._alert_buffer.append(row)
+            self._start_alert_flusher()
+            return alert_id
+        with self._write() as (conn, cursor):
+            cursor.execute(
+                _INSERT_ALERT_SQL,
+                row
+            )
+            conn.commit()
+            return alert_id
+
+    def flush_alerts(self):
+        """Write all queued alerts in one transaction.
+        If the batch fails, rows are retried one at a time: rows the database rejects
+        are logged and dropped, and rows that hit a transient error (e.g. a locked
+        database) go back on the queue for the next flush. Errors are logged, not raised.
+        """
+        with self._alert_lock:
+            if not self._alert_buffer:
+                return
+            rows = []
+            while self._alert_buffer:
+                rows.append(self._alert_buffer.popleft())
+            try:
+                with self._write() as (conn, cursor):
+                    cursor.executemany(
+                        _INSERT_ALERT_SQL,
+                        rows
+                    )
+                    conn.commit()
+                return
+            except sqlite3.Error as e:
+                print(f"Error writing queued alerts, retrying one by one: {str(e)}")
+            retry = []
+            with self._write() as (conn, cursor):
+                for row in rows:
+                    try:
+                        cursor.execute(_INSERT_ALERT_SQL, row)
+                        conn.commit()
+                    except sqlite3.IntegrityError as e:
+                        conn.rollback()
+                        print(f"Dropping queued alert {row[0]}: {str(e)}")
+                    except sqlite3.Error as e:
+                        conn.rollback()
+                        retry.append(row)
+            if retry:
+                print(f"Requeued {len(retry)} alerts after a write error")
+                self._alert_buffer.extendleft(reversed(retry))
+
+    def _start_alert_flusher(self):
+        """Start the background thread that flushes queued alerts, once."""
+        if self._alert_flusher is not None:
+            return
+        with self._alert_lock:
+            if self._alert_flusher is not None:
+                return
+            self._alert_flusher = threading.Thread(target=self._flush_alerts_forever, daemon=True)
+            self._alert_flusher.start()
+            # Don't lose the last batch when the process exits
+            atexit.register(self.flush_alerts)
+
+    def _flush_alerts_forever(self):
+        while True:
+            time.sleep(ALERT_FLUSH_INTERVAL)
+            try:
+                self.flush_alerts()
+            except Exception as e:
+                print(f"Error writing queued alerts: {str(e)}")
 
     def get_alert(self, alert_id):
-        """Get alert by ID."""
-        conn, cursor = self.connect()
-        cursor.execute("SELECT * FROM alerts WHERE id = ?", (alert_id,))
-        return dict(cursor.fetchone() or {})
+        """Get alert by ID as a sqlite3.Row (key and index access), or None."""
+        self.flush_alerts()
+        with self._read() as (conn, cursor):
+            cursor.execute(_SELECT_ALERT_SQL, (alert_id,))
+            return cursor.fetchone()
 
     def get_active_alerts(self, latitude, longitude, radius_km=5.0):
         """Get active alerts within a radius of a location."""
-        conn, cursor = self.connect()
-        lat_range = radius_km / 111.0
-        lng_range = radius_km / (111.0 * cos(radians(latitude)))
-        cursor.execute(
-            """SELECT * FROM alerts 
-               WHERE status = 'active'
-               AND latitude BETWEEN ? AND ?
-               AND longitude BETWEEN ? AND ?""",
-            (latitude - lat_range, latitude + lat_range, 
-             longitude - lng_range, longitude + lng_range)
-        )
-        alerts = []
-        for row in cursor.fetchall():
-            alert = dict(row)
-            distance = self.calculate_distance(
-                latitude, longitude, alert['latitude'], alert['longitude']
+        self.flush_alerts()
+        with self._read() as (conn, cursor):
+            lat_rad = radians(latitude)
+            cos_lat = cos(lat_rad)
+            lat_range = radius_km / 111.0
+            lng_range = radius_km / (111.0 * max(0.01, cos_lat))
+            # Filtered by distance and sorted (highest severity first, then nearest) in SQLite
+            cursor.execute(
+                _SELECT_ACTIVE_ALERTS_IN_AREA_SQL,
+                (lat_rad, radians(longitude), cos_lat,
+                 latitude - lat_range, latitude + lat_range, 
+                 longitude - lng_range, longitude + lng_range,
+                 radius_km)
             )
-            if distance <= radius_km:
-                alert['distance_km'] = round(distance, 2)
+            alerts = []
+            for row in cursor.fetchall():
+                alert = dict(row)
+                alert['distance_km'] = round(alert['distance_km'], 2)
                 alerts.append(alert)
-        alerts.sort(key=lambda x: (
-            0 if x["severity"] == "high" else (1 if x["severity"] == "medium" else 2),
-            x["distance_km"]
-        ))
-        return alerts
+            return alerts
 
     def verify_alert(self, alert_id, verification_type="confirm"):
-        """Verify or dispute an alert."""
-        conn, cursor = self.connect()
-        cursor.execute("SELECT * FROM alerts WHERE id = ?", (alert_id,))
-        alert = dict(cursor.fetchone() or {})
-        if not alert:
-            return False
-        if verification_type == "confirm":
-            new_count = alert.get('verification_count', 0) + 1
-            cursor.execute(
-                "UPDATE alerts SET verification_count = ?, updated_at = ? WHERE id = ?",
-                (new_count, datetime.now().isoformat(), alert_id)
-            )
-            if new_count >= 3 and alert.get('severity') != "high":
-                cursor.execute(
-                    "UPDATE alerts SET severity = ?, updated_at = ? WHERE id = ?",
-                    ("high", datetime.now().isoformat(), alert_id)
-                )
-        else:
-            cursor.execute(
-                "UPDATE alerts SET status = ?, updated_at = ? WHERE id = ?",
-                ("disputed", datetime.now().isoformat(), alert_id)
-            )
-        conn.commit()
-        return True
+        """Verify or dispute an alert. Returns the updated alert, or None if it doesn't exist."""
+        self.flush_alerts()
+        now = datetime.now().isoformat()
+        sql = _CONFIRM_ALERT_SQL if verification_type == "confirm" else _DISPUTE_ALERT_SQL
+        with self._write() as (conn, cursor):
+            cursor.execute(sql, (now, alert_id))
+            row = cursor.fetchone()
+            conn.commit()
+            return dict(row) if row is not None else None
 
     def resolve_alert(self, alert_id, resolution_details=None):
         """Mark an alert as resolved."""
-        conn, cursor = self.connect()
+        self.flush_alerts()
         now = datetime.now().isoformat()
-        if resolution_details:
-            resolution_json = json.dumps(resolution_details)
-            cursor.execute(
-                "UPDATE alerts SET status = ?, updated_at = ?, resolution_details = ? WHERE id = ?",
-                ("resolved", now, resolution_json, alert_id)
-            )
-        else:
-            cursor.execute(
-                "UPDATE alerts SET status = ?, updated_at = ? WHERE id = ?",
-                ("resolved", now, alert_id)
-            )
-        conn.commit()
-        return cursor.rowcount > 0
+        with self._write() as (conn, cursor):
+            if resolution_details:
+                resolution_json = orjson.dumps(resolution_details).decode()
+                cursor.execute(
+                    _RESOLVE_ALERT_WITH_DETAILS_SQL,
+                    ("resolved", now, resolution_json, alert_id)
+                )
+            else:
+                cursor.execute(
+                    _RESOLVE_ALERT_SQL,
+                    ("resolved", now, alert_id)
+                )
+            conn.commit()
+            return cursor.rowcount > 0
 
     # SOS methods
     def create_sos(self, user_id, latitude, longitude, message, contacts_notified):
-        """Record an SOS event."""
-        conn, cursor = self.connect()
+        """Record an SOS event and return its ID."""
         now = datetime.now().isoformat()
-        contacts_json = json.dumps(contacts_notified)
-        cursor.execute(
-            """INSERT INTO sos_history 
-               (user_id, latitude, longitude, message, contacts_notified, created_at) 
-               VALUES (?, ?, ?, ?, ?, ?)""",
-            (user_id, latitude, longitude, message, contacts_json, now)
-        )
-        conn.commit()
-        return cursor.lastrowid
+        with self._write() as (conn, cursor):
+            contacts_json = orjson.dumps(contacts_notified).decode()
+            cursor.execute(
+                _INSERT_SOS_SQL,
+                (user_id, latitude, longitude, message, contacts_json, now)
+            )
+            conn.commit()
+            return cursor.lastrowid
 
     def get_sos_history(self, user_id):
         """Get SOS history for a user."""
-        conn, cursor = self.connect()
-        cursor.execute("SELECT * FROM sos_history WHERE user_id = ? ORDER BY created_at DESC", (user_id,))
-        sos_events = []
-        for row in cursor.fetchall():
-            event = dict(row)
-            event['contacts_notified'] = json.loads(event['contacts_notified'])
-            sos_events.append(event)
-        return sos_events
+        with self._read() as (conn, cursor):
+            cursor.execute(_SELECT_SOS_HISTORY_SQL, (user_id,))
+            sos_events = []
+            for row in cursor.fetchall():
+                event = dict(row)
+                event['contacts_notified'] = orjson.loads(event['contacts_notified'])
+                sos_events.append(event)
+            return sos_events
 
     # Helper methods
     def calculate_distance(self, lat1, lon1, lat2, lon2):
         """Calculate distance between two points in km using the Haversine formula."""
-        from math import radians, cos, sin, asin, sqrt
-        lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
-        r = 6371  # Radius of earth in kilometers
-        return c * r
+        return haversine_km(lat1, lon1, lat2, lon2)
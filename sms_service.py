@@ -1,23 +1,63 @@
 import os
-from twilio.rest import Client
+import asyncio
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Maximum number of in-flight sends, to stay within the provider's rate limit
+MAX_CONCURRENT_SMS = 10
+
+# Long-lived worker threads for run_coroutine, so a send does not pay for
+# starting and joining a fresh thread each time
+_coroutine_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="sms")
+
+def run_coroutine(coro):
+    """
+    Run a coroutine to completion and return its result
+    
+    The coroutine runs on its own event loop in a worker thread, so this is safe
+    to call from code that already has a loop running.
+    """
+    return _coroutine_executor.submit(asyncio.run, coro).result()
+
+@lru_cache(maxsize=1)
+def _twilio_credentials():
+    """Twilio account SID, auth token and sender number, read from the environment once"""
+    return (
+        os.getenv("TWILIO_ACCOUNT_SID"),
+        os.getenv("TWILIO_AUTH_TOKEN"),
+        os.getenv("TWILIO_PHONE_NUMBER"),
+    )
+
+@lru_cache(maxsize=None)
+def _twilio_client(account_sid, auth_token):
+    """Shared blocking Twilio client, so every SMSService reuses one pool of keep-alive connections"""
+    # twilio is imported on first use so importing this module stays cheap
+    from requests.adapters import HTTPAdapter
+    from twilio.http.http_client import TwilioHttpClient
+    from twilio.rest import Client
+    http_client = TwilioHttpClient()
+    http_client.session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=32))
+    return Client(account_sid, auth_token, http_client=http_client)
+
 class SMSService:
     def __init__(self):
         """Initialize the SMS service with Twilio credentials"""
         # Get Twilio credentials from environment variables
-        self.account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-        self.auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-        self.from_number = os.getenv("TWILIO_PHONE_NUMBER")
+        self.account_sid, self.auth_token, self.from_number = _twilio_credentials()
+        
+        # Bulk sends go out in batches with a pause in between to stay under the carrier rate limit
+        self.batch_size = max(1, int(os.getenv("SMS_BATCH_SIZE", "5")))
+        self.batch_delay = float(os.getenv("SMS_BATCH_DELAY", "0.5"))
         
         # Check if credentials are available
         self.enabled = all([self.account_sid, self.auth_token, self.from_number])
         
         if self.enabled:
-            self.client = Client(self.account_sid, self.auth_token)
+            self.client = _twilio_client(self.account_sid, self.auth_token)
         else:
             print("Warning: Twilio credentials not found. SMS notifications will be simulated.")
     
@@ -60,9 +100,70 @@ class SMSService:
                 "error": str(e)
             }
     
+    async def send_sms_async(self, to_number, message):
+        """
+        Send an SMS message without blocking the event loop
+        
+        The send runs on a worker thread through the shared Twilio client, so
+        concurrent sends reuse its pool of keep-alive connections.
+        
+        Args:
+            to_number: Recipient's phone number (with country code)
+            message: Message content
+            
+        Returns:
+            Dict with status and message ID if successful
+        """
+        return await asyncio.to_thread(self.send_sms, to_number, message)
+    
+    async def send_bulk_sms_async(self, to_numbers, message):
+        """
+        Send the same SMS to several numbers over the shared connection pool
+        
+        Numbers are sent in batches of batch_size, concurrently within a batch,
+        with batch_delay seconds between batches.
+        
+        Args:
+            to_numbers: List of recipient phone numbers
+            message: Message content
+            
+        Returns:
+            List of send results, in the same order as to_numbers
+        """
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SMS)
+        
+        async def send(to_number):
+            async with semaphore:
+                return await self.send_sms_async(to_number, message)
+        
+        results = []
+        for start in range(0, len(to_numbers), self.batch_size):
+            if start:
+                await asyncio.sleep(self.batch_delay)
+            batch = to_numbers[start:start + self.batch_size]
+            results.extend(await asyncio.gather(*(send(to_number) for to_number in batch)))
+        return results
+    
+    def send_bulk_sms(self, to_numbers, message):
+        """
+        Blocking wrapper around send_bulk_sms_async
+        
+        Args:
+            to_numbers: List of recipient phone numbers
+            message: Message content
+            
+        Returns:
+            List of send results, in the same order as to_numbers
+        """
+        if not to_numbers:
+            return []
+        
+        return run_coroutine(self.send_bulk_sms_async(to_numbers, message))
+    
     def send_sos_notifications(self, user_name, location, message, emergency_contacts):
         """
-        Send SOS notifications to all emergency contacts
+        Send SOS notifications to all emergency contacts (blocking wrapper around
+        send_sos_notifications_async)
         
         Args:
             user_name: Name of the user in distress
@@ -73,8 +174,23 @@ class SMSService:
         Returns:
             List of notification results
         """
-        results = []
+        return run_coroutine(
+            self.send_sos_notifications_async(user_name, location, message, emergency_contacts)
+        )
+    
+    async def send_sos_notifications_async(self, user_name, location, message, emergency_contacts):
+        """
+        Send SOS notifications to all emergency contacts concurrently
         
+        Args:
+            user_name: Name of the user in distress
+            location: Dict with latitude and longitude
+            message: Custom message or description of the emergency
+            emergency_contacts: List of contact dicts with name and phone
+            
+        Returns:
+            List of notification results
+        """
         # Format the location as a Google Maps link
         maps_link = f"https://www.google.com/maps?q={location['latitude']},{location['longitude']}"
         
@@ -86,17 +202,19 @@ class SMSService:
         
         sos_message += "\nPlease respond immediately or contact authorities."
         
-        # Send to each emergency contact
-        for contact in emergency_contacts:
-            phone = contact.get('phone')
-            if phone:
-                # Make sure phone number has country code
-                if not phone.startswith('+'):
-                    phone = '+' + phone
-                
-                result = self.send_sms(phone, sos_message)
-                result['contact_name'] = contact.get('name')
-                result['contact_phone'] = phone
-                results.append(result)
-        
-        return results
\ No newline at end of file
+        # Name and number of every contact with a phone, making sure the number has a country code
+        formatted_contacts = [
+            (c.get('name'), c['phone'] if c['phone'].startswith('+') else '+' + c['phone'])
+            for c in emergency_contacts if c.get('phone')
+        ]
+        
+        # Send to all of them concurrently
+        send_results = await self.send_bulk_sms_async([phone for _, phone in formatted_contacts], sos_message)
+        
+        return [
+            {**result, "contact_name": name, "contact_phone": phone}
+            for (name, phone), result in zip(formatted_contacts, send_results)
+        ]
+
+# Shared instance, so the Twilio client and its connections are reused across requests
+sms_service = SMSService()